@@ -1,17 +1,33 @@
-from itertools import permutations
-import numpy as np
+import sys
 
 nums = ['-0', '-1', '-1', '-1', '-0']
 
-seen = set()
-res = []
+PREFIX = "["
+SUFFIX = "]\n"
 
-for p in permutations(nums, len(nums)):
-    if p in seen:
-        continue
-    seen.add(p)
-    s = "[" + "".join(str(x) for x in p) + "]" 
-    res.append(s)
 
-for s in res:
-    print(s)
+# Same routine as next_permutation in experiment/five/generate.py (documented there);
+# both scripts run standalone, so keep the two copies in sync.
+def next_permutation(a: bytearray) -> bool:
+    j = len(a) - 2
+    while j >= 0 and a[j] >= a[j + 1]:
+        j -= 1
+    if j < 0:
+        return False
+    l = len(a) - 1
+    while a[j] >= a[l]:
+        l -= 1
+    a[j], a[l] = a[l], a[j]
+    a[j + 1:] = a[:j:-1]
+    return True
+
+
+# permute small integer codes of the sorted symbols instead of tuples of strings
+symbols = sorted(set(nums))
+perm = bytearray(sorted(symbols.index(x) for x in nums))
+
+write = sys.stdout.write
+while True:
+    write("".join([PREFIX, *map(symbols.__getitem__, perm), SUFFIX]))
+    if not next_permutation(perm):
+        break
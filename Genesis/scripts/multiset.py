@@ -1,14 +1,14 @@
-from itertools import product
+import numpy as np
 
 def patterns(m):
     """Return all multiset-types of (a,b,c,d) with |a|+|b|+|c|+|d| = m."""
-    reps = set()
-    for a, b, c, d in product(range(-m, m+1), repeat=4):
-        if abs(a) + abs(b) + abs(c) + abs(d) != m:
-            continue
-        rep = tuple(sorted((a, b, c, d)))
-        reps.add(rep)
-    return sorted(reps)
+    g = np.arange(-m, m+1)
+    A, B, C, D = np.meshgrid(g, g, g, g, indexing='ij')
+    mask = np.abs(A) + np.abs(B) + np.abs(C) + np.abs(D) == m
+    pts = np.stack([A[mask], B[mask], C[mask], D[mask]], axis=1)
+    pts.sort(axis=1)
+    uniq = np.unique(pts, axis=0)
+    return [tuple(int(x) for x in r) for r in uniq]
 
 for r in patterns(5):
     print(r)
@@ -104,16 +104,18 @@ def peephole_optimize(circ: circuits.Circuit) -> circuits.Circuit:
 
 def main(fname_in: str, fname_out: str | None = None):
     circ = qparser.read_qasm(fname_in)
-    before = circ.get_metrics()
-    before_depths = circ.depths()
+    # build the gate sequence once and reuse it for every metric below
+    seq = circ.get_sequence()
+    before = circ.get_metrics(seq)
+    before_depths = circ.depths(seq)
     print("Before metrics:")
     for k, v in before.items():
         print(f"  {k}: {v}")
     # compute unit-layer depth (every gate costs 1 layer)
-    def compute_unit_depth(circ_obj: circuits.Circuit) -> int:
+    def compute_unit_depth(sequence: list[circuits.Node]) -> int:
         from collections import defaultdict
         depths = defaultdict(int)
-        for node in circ_obj.get_sequence():
+        for node in sequence:
             wires = getattr(node, 'wires', [])
             if not wires:
                 continue
@@ -125,13 +127,14 @@ def main(fname_in: str, fname_out: str | None = None):
                 depths[wires[0]] += 1
         return max(depths.values()) if depths else 0
 
-    before_unit_depth = compute_unit_depth(circ)
+    before_unit_depth = compute_unit_depth(seq)
     print(f"  depth_layers (unit cost): {before_unit_depth}")
 
     optimized = peephole_optimize(circ)
-    after = optimized.get_metrics()
-    after_depths = optimized.depths()
-    after_unit_depth = compute_unit_depth(optimized)
+    opt_seq = optimized.get_sequence()
+    after = optimized.get_metrics(opt_seq)
+    after_depths = optimized.depths(opt_seq)
+    after_unit_depth = compute_unit_depth(opt_seq)
     print("After metrics:")
     for k, v in after.items():
         print(f"  {k}: {v}")
@@ -480,9 +480,12 @@ class Circuit:
                 c2ptr = c2ptr.next(remap(q))
         return True
 
-    def depths(this):
+    #sequence: an already computed this.get_sequence(), to avoid rebuilding it
+    def depths(this, sequence:list[Node]|None = None):
         current_depths:defaultdict[wire_t, float] = defaultdict(float)
-        for n in this.get_sequence():
+        if sequence is None:
+            sequence = this.get_sequence()
+        for n in sequence:
             current_indices = n.wires
             depth = max(current_depths[i] for i in current_indices) + n.get_latecy()
             for i in current_indices:
@@ -806,11 +809,11 @@ class Circuit:
             if node.nodeType == "commentLine":
                 node.remove_from_circuit()
 
-    def get_metrics(this):
+    def get_metrics(this, sequence:list[Node]|None = None):
         out = dict()
-        seq = this.get_sequence()
+        seq = this.get_sequence() if sequence is None else sequence
         out['single op gate count'] = len([True for n in seq if len(n.wires) <= 1])
         out['multi op gate count'] = len(seq) - out['single op gate count']
         out['total gate count'] = len(seq)
-        out['depth'] = max(this.depths().values())
+        out['depth'] = max(this.depths(seq).values())
         return out
\ No newline at end of file
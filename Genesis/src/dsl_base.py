@@ -0,0 +1,24 @@
+# src.dsl_base
+
+from antlr4.tree.Tree import ParseTreeListener, ParseTreeVisitor
+
+
+class HamiltonianDSLListener(ParseTreeListener):
+    """
+    Stub-free listener base for hamiltonianDSL parse trees.
+    Unlike generated.hamiltonianDSLListener it defines no no-op enterX/exitX
+    methods: every rule context only dispatches when hasattr(listener, "enterX")
+    holds, so subclasses override just the events they need and
+    src.tree_walker skips the rest.
+    """
+    __slots__ = ()
+
+
+class HamiltonianDSLVisitor(ParseTreeVisitor):
+    """
+    Stub-free visitor base for hamiltonianDSL parse trees.
+    Unlike generated.hamiltonianDSLVisitor it defines no visitX methods that
+    only return self.visitChildren(ctx): every rule context falls back to
+    visitor.visitChildren(ctx) when hasattr(visitor, "visitX") does not hold.
+    """
+    __slots__ = ()
@@ -1,7 +1,7 @@
 # src.hamiltonian_visitor
 
 from antlr4 import *
-from generated.hamiltonianDSLVisitor import hamiltonianDSLVisitor
+from src.dsl_base import HamiltonianDSLVisitor
 from generated.hamiltonianDSLParser import hamiltonianDSLParser
 
 # Import the AST node classes and enums from ast_nodes.
@@ -26,7 +26,7 @@ stream_handler.setFormatter(stream_formatter)
 logger.addHandler(stream_handler)
 
 
-class HamiltonianVisitor(hamiltonianDSLVisitor):
+class HamiltonianVisitor(HamiltonianDSLVisitor):
     def __init__(self):
         super().__init__()
         self.symbol_table = {}
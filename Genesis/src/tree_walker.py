@@ -0,0 +1,78 @@
+# src.tree_walker
+
+import functools
+
+from antlr4.tree.Tree import ParseTreeListener, ParseTreeWalker, ErrorNode, TerminalNode
+from generated.hamiltonianDSLParser import hamiltonianDSLParser
+
+# rule context classes of the grammar, e.g. ProgramContext -> "Program"
+_RULE_CONTEXTS = {
+    name[:-len("Context")]: cls
+    for name, cls in vars(hamiltonianDSLParser).items()
+    if name.endswith("Context") and isinstance(cls, type)
+}
+
+
+def _overrides(listener_cls, name):
+    method = getattr(listener_cls, name, None)
+    return method is not None and method is not getattr(ParseTreeListener, name, None)
+
+
+@functools.lru_cache(maxsize=None)
+def make_specialized_walker(listener_cls):
+    """
+    Build a walk(listener, tree) function specialized for listener_cls.
+    Only the enterX/exitX (and enterEveryRule/exitEveryRule, visitTerminal,
+    visitErrorNode) methods that listener_cls actually defines are dispatched;
+    every other rule event compiles away. Results are cached per class.
+    """
+    enters = [r for r in _RULE_CONTEXTS if _overrides(listener_cls, "enter" + r)]
+    exits = [r for r in _RULE_CONTEXTS if _overrides(listener_cls, "exit" + r)]
+
+    lines = ["def walk(listener, t):"]
+    lines.append("    if isinstance(t, ErrorNode):")
+    if _overrides(listener_cls, "visitErrorNode"):
+        lines.append("        listener.visitErrorNode(t)")
+    lines.append("        return")
+    lines.append("    if isinstance(t, TerminalNode):")
+    if _overrides(listener_cls, "visitTerminal"):
+        lines.append("        listener.visitTerminal(t)")
+    lines.append("        return")
+    lines.append("    ctx = t.getRuleContext()")
+    if enters or exits:
+        lines.append("    cls = type(ctx)")
+    if _overrides(listener_cls, "enterEveryRule"):
+        lines.append("    listener.enterEveryRule(ctx)")
+    for i, r in enumerate(enters):
+        lines.append(f"    {'if' if i == 0 else 'elif'} cls is _C_{r}:")
+        lines.append(f"        listener.enter{r}(ctx)")
+    lines.append("    for child in t.getChildren():")
+    lines.append("        walk(listener, child)")
+    for i, r in enumerate(exits):
+        lines.append(f"    {'if' if i == 0 else 'elif'} cls is _C_{r}:")
+        lines.append(f"        listener.exit{r}(ctx)")
+    if _overrides(listener_cls, "exitEveryRule"):
+        lines.append("    listener.exitEveryRule(ctx)")
+
+    namespace = {"ErrorNode": ErrorNode, "TerminalNode": TerminalNode}
+    namespace.update({f"_C_{r}": cls for r, cls in _RULE_CONTEXTS.items()})
+    exec(compile("\n".join(lines), f"<walker {listener_cls.__qualname__}>", "exec"), namespace)
+    return namespace["walk"]
+
+
+class HamiltonianTreeWalker(ParseTreeWalker):
+    """
+    ParseTreeWalker that only dispatches listener events which are actually defined.
+    The walk itself is delegated to make_specialized_walker(type(listener)), so
+    methods attached to a listener instance (rather than its class) are not seen.
+    Derive listeners from src.dsl_base.HamiltonianDSLListener: the no-op stubs of
+    generated.hamiltonianDSLListener count as defined events and are dispatched.
+    Use HamiltonianTreeWalker.DEFAULT.walk(listener, tree) wherever
+    ParseTreeWalker.DEFAULT.walk would be used; the event order is the same.
+    """
+
+    def walk(self, listener: ParseTreeListener, t):
+        make_specialized_walker(type(listener))(listener, t)
+
+
+HamiltonianTreeWalker.DEFAULT = HamiltonianTreeWalker()
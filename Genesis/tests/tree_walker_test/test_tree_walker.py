@@ -0,0 +1,118 @@
+# Run this file from the folder containing 'tests', as following:
+# python3 -m pytest tests/tree_walker_test/test_tree_walker.py
+# (or: python3 -m tests.tree_walker_test.test_tree_walker)
+
+import glob
+
+from antlr4 import FileStream, InputStream, CommonTokenStream
+from antlr4.tree.Tree import ParseTreeWalker
+
+from generated.hamiltonianDSLLexer import hamiltonianDSLLexer
+from generated.hamiltonianDSLParser import hamiltonianDSLParser
+from generated.hamiltonianDSLListener import hamiltonianDSLListener
+from src.dsl_base import HamiltonianDSLListener
+from src.tree_walker import HamiltonianTreeWalker
+
+in_file_paths = sorted(glob.glob("benchmark/*.ham"))
+
+
+def parse_tree(file_path):
+    lexer = hamiltonianDSLLexer(FileStream(file_path, encoding="utf-8"))
+    parser = hamiltonianDSLParser(CommonTokenStream(lexer))
+    return parser.program()
+
+
+class SparseListener(HamiltonianDSLListener):
+    """Only a few rule events plus terminals, on the stub-free base."""
+
+    def __init__(self):
+        self.events = []
+
+    def enterProgram(self, ctx):
+        self.events.append(("enterProgram", ctx.start.tokenIndex))
+
+    def exitProgram(self, ctx):
+        self.events.append(("exitProgram", ctx.start.tokenIndex))
+
+    def enterStatement(self, ctx):
+        self.events.append(("enterStatement", ctx.start.tokenIndex))
+
+    def exitAddExpr(self, ctx):
+        self.events.append(("exitAddExpr", ctx.start.tokenIndex))
+
+    def enterQuantumOp(self, ctx):
+        self.events.append(("enterQuantumOp", ctx.getText()))
+
+    def exitQuantumOp(self, ctx):
+        self.events.append(("exitQuantumOp", ctx.getText()))
+
+    def visitTerminal(self, node):
+        self.events.append(("terminal", node.getText()))
+
+
+class EveryRuleListener(HamiltonianDSLListener):
+    """Generic hooks interleaved with a rule-specific one."""
+
+    def __init__(self):
+        self.events = []
+
+    def enterEveryRule(self, ctx):
+        self.events.append(("enterEveryRule", type(ctx).__name__))
+
+    def exitEveryRule(self, ctx):
+        self.events.append(("exitEveryRule", type(ctx).__name__))
+
+    def enterMulExpr(self, ctx):
+        self.events.append(("enterMulExpr", ctx.getText()))
+
+    def visitErrorNode(self, node):
+        self.events.append(("error", node.getText()))
+
+
+class GeneratedStubListener(hamiltonianDSLListener):
+    """The generated listener: every enterX/exitX exists as a no-op stub."""
+
+    def __init__(self):
+        self.events = []
+
+    def exitRangeVar(self, ctx):
+        self.events.append(("exitRangeVar", ctx.getText()))
+
+    def exitEveryRule(self, ctx):
+        self.events.append(("exitEveryRule", type(ctx).__name__))
+
+
+def events_of(listener_cls, walker, tree):
+    listener = listener_cls()
+    walker.walk(listener, tree)
+    return listener.events
+
+
+def test_event_sequence_matches_default_walker():
+    assert in_file_paths
+    for in_file_path in in_file_paths:
+        tree = parse_tree(in_file_path)
+        for listener_cls in (SparseListener, EveryRuleListener, GeneratedStubListener):
+            expected = events_of(listener_cls, ParseTreeWalker.DEFAULT, tree)
+            actual = events_of(listener_cls, HamiltonianTreeWalker.DEFAULT, tree)
+            assert expected, (in_file_path, listener_cls.__name__)
+            assert actual == expected, (in_file_path, listener_cls.__name__)
+
+
+def test_event_sequence_with_syntax_errors():
+    # error nodes of a broken input are dispatched in the same order too
+    parser = hamiltonianDSLParser(CommonTokenStream(hamiltonianDSLLexer(
+        InputStream("Const = ;\nResult = * Pauli_Z[;"))))
+    parser.removeErrorListeners()
+    tree = parser.program()
+    for listener_cls in (SparseListener, EveryRuleListener):
+        expected = events_of(listener_cls, ParseTreeWalker.DEFAULT, tree)
+        actual = events_of(listener_cls, HamiltonianTreeWalker.DEFAULT, tree)
+        assert actual == expected, listener_cls.__name__
+    assert ("error", "=") in events_of(EveryRuleListener, ParseTreeWalker.DEFAULT, tree)
+
+
+if __name__ == "__main__":
+    test_event_sequence_matches_default_walker()
+    test_event_sequence_with_syntax_errors()
+    print(f"tree walker events match ParseTreeWalker.DEFAULT on {len(in_file_paths)} files")
@@ -0,0 +1,51 @@
+import heapq
+import random
+
+from tree_compiler.compiler import BucketQueue
+
+
+def test_fifo_within_same_key():
+    q = BucketQueue()
+    for item in "abc":
+        q.push(5, item)
+    assert len(q) == 3
+    assert [q.pop() for _ in range(3)] == ["a", "b", "c"]
+    assert not q
+
+
+def test_pops_minimum_key_first():
+    q = BucketQueue()
+    for key, item in [(30, "x"), (10, "a"), (20, "m"), (10, "b"), (30, "y")]:
+        q.push(key, item)
+    assert [q.pop() for _ in range(5)] == ["a", "b", "m", "x", "y"]
+
+
+def test_emptied_and_refilled_bucket():
+    q = BucketQueue()
+    q.push(3, "a")
+    q.push(7, "b")
+    assert q.pop() == "a"          # 键 3 的桶被取空
+    q.push(3, "c")                 # 重新填充同一个键
+    q.push(1, "d")                 # 比当前最小键更小的新键
+    q.push(7, "e")
+    assert [q.pop() for _ in range(4)] == ["d", "c", "b", "e"]
+    assert len(q) == 0
+    q.push(5, "f")                 # 完全取空后仍可继续使用
+    assert q.pop() == "f"
+
+
+def test_matches_heapq_reference():
+    rng = random.Random(0)
+    q, ref = BucketQueue(), []
+    counter = 0
+    for _ in range(20000):
+        if ref and rng.random() < 0.45:
+            _, _, expected = heapq.heappop(ref)
+            assert q.pop() == expected
+        else:
+            key = rng.randint(0, 50)
+            # (key, 入队序号) 作为参照堆的优先级，即同一键内先进先出
+            heapq.heappush(ref, (key, counter, counter))
+            q.push(key, counter)
+            counter += 1
+        assert len(q) == len(ref)
@@ -0,0 +1,22 @@
+from tree_compiler import compiler
+from tree_compiler.compiler import Hamiltonian, dagger, find_optimal_path, is_hermitian
+from tree_compiler.operator import Scalar, a, a_dag, extract_qumodes
+
+
+def test_dagger_keeps_scalar_type_regardless_of_call_order():
+    # 这些标量两两相等 (哈希也相同) 但打印不同
+    for x, y in [(Scalar(2), Scalar(2.0)), (Scalar(0.0), Scalar(-0.0)), (Scalar(1j), Scalar(complex(-0.0, 1)))]:
+        assert x == y
+        for first, second in [(x, y), (y, x)]:
+            compiler.clear_caches()
+            dagger(first)
+            assert repr(dagger(second)) == repr(Scalar(second.value.conjugate()))
+
+
+def test_caches_released_after_search():
+    # 搜索返回后缓存应为空，上一次搜索的算符不会一直存活
+    H = Hamiltonian(expr=a(1) * a_dag(2) ** 3 + a(2) ** 3 * a_dag(1), is_leaf=False)
+    find_optimal_path(H)
+    for cache in (compiler._dagger, is_hermitian, extract_qumodes, compiler._qumode_mask,
+                  compiler._rules_for_expr, compiler.estimate_complexity):
+        assert cache.cache_info().currsize == 0
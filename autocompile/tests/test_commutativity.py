@@ -0,0 +1,39 @@
+from tree_compiler.compiler import Hamiltonian, is_commutative, rule_7
+from tree_compiler.operator import S, X, Y, Z, a, a_dag
+
+
+def test_disjoint_qumodes_commute():
+    assert is_commutative(a(1), a_dag(2))
+    assert is_commutative(a(1) * a_dag(1), a(2) * a(3))
+    assert is_commutative(a(1) + a_dag(2), a(3) ** 2)
+    # 标量不涉及任何 qumode，与任何算符都对易
+    assert is_commutative(S(2.0), a(1))
+    assert is_commutative(S(1j), S(2.0))
+
+
+def test_shared_qumode_does_not_commute():
+    # 共享 qumode 时一律保守地视为不对易，即使 M 与 N 实际上对易
+    assert not is_commutative(a(1), a_dag(1))
+    assert not is_commutative(a(1), a(1))
+    assert not is_commutative(a(1) * a_dag(2), a_dag(2) * a(3))
+    assert not is_commutative(a_dag(1) * a(1), a_dag(1) * a(1))
+
+
+def test_pauli_only_operands():
+    # Pauli 的 index 按 qumode 计
+    assert is_commutative(X(0), Z(1))
+    assert is_commutative(X(0) * Y(1), Z(2))
+    assert not is_commutative(X(0), Z(0))
+    assert not is_commutative(Z(0), Z(0))
+    assert not is_commutative(X(0) * Y(1), Z(1))
+    # Pauli 与玻色算符只在 index 相同时冲突
+    assert is_commutative(Z(0), a(1))
+    assert not is_commutative(Z(1), a(1))
+
+
+def test_rule_7_only_splits_at_disjoint_cut():
+    # a_1 a†_2 a†_2 a†_2 只有在 a_1 | a†_2^3 处切开时两部分不共享 qumode
+    term = a(1) * a_dag(2) ** 3
+    H = Hamiltonian(expr=term + a(2) ** 3 * a_dag(1), is_leaf=False)
+    successors = rule_7(H)
+    assert len(successors) == 1
@@ -0,0 +1,94 @@
+from functools import reduce
+
+from tree_compiler.compiler import Hamiltonian, compact, compact_splice
+from tree_compiler.operator import S, a
+
+
+def h(*qumodes):
+    """作用在给定 qumode 上的叶节点 H (没有 qumode 时为标量)。"""
+    if not qumodes:
+        return Hamiltonian(expr=S(2.0), is_leaf=True)
+    return Hamiltonian(expr=reduce(lambda x, y: x * y, [a(q) for q in qumodes]), is_leaf=True)
+
+
+def as_sets(blocks):
+    return [(mask, frozenset(hs)) for mask, hs in blocks]
+
+
+def mask_of(*qumodes):
+    return sum(1 << q for q in qumodes)
+
+
+def check_invariants(blocks):
+    for mask, hs in blocks:
+        assert hs
+        assert mask == reduce(lambda m, H: m | H.qumode_mask, hs, 0)
+        # 块内的 H 两两不共享 qumode
+        seen = 0
+        for H in hs:
+            assert H.qumode_mask & seen == 0
+            seen |= H.qumode_mask
+
+
+def test_splice_at_head():
+    h12, h23 = h(1, 2), h(2, 3)
+    blocks = compact([h12, h23])
+    assert as_sets(blocks) == [(mask_of(1, 2), {h12}), (mask_of(2, 3), {h23})]
+
+    # 原块只剩 H_old 且左边没有块：新 H 自成一块，再整块吸收不相交的后续块
+    new, n_head, n_tail = compact_splice(blocks, 0, h12, [h(1), h(4)])
+    assert as_sets(new) == [(mask_of(1, 2, 3, 4), {h(1), h(4), h23})]
+    assert (n_head, n_tail) == (0, 0)
+    check_invariants(new)
+
+
+def test_splice_in_middle_reuses_untouched_blocks():
+    h1, h12, h23, h4, h34 = h(1), h(1, 2), h(2, 3), h(4), h(3, 4)
+    blocks = compact([h1, h12, h23, h4, h34])
+    assert as_sets(blocks) == [
+        (mask_of(1), {h1}), (mask_of(1, 2), {h12}),
+        (mask_of(2, 3, 4), {h23, h4}), (mask_of(3, 4), {h34}),
+    ]
+
+    # 原块还剩 h23：h5 并入其中，h34 与之冲突，前两块和最后一块原样复用
+    new, n_head, n_tail = compact_splice(blocks, 2, h4, [h(5)])
+    assert as_sets(new) == [
+        (mask_of(1), {h1}), (mask_of(1, 2), {h12}),
+        (mask_of(2, 3, 5), {h23, h(5)}), (mask_of(3, 4), {h34}),
+    ]
+    assert (n_head, n_tail) == (2, 1)
+    assert new[:2] == blocks[:2] and new[3] is blocks[3]
+    check_invariants(new)
+
+
+def test_splice_at_tail():
+    h12, h23 = h(1, 2), h(2, 3)
+    blocks = compact([h12, h23])
+
+    # 最后一块只有 H_old：新 H 并入左邻块，冲突时另起新块
+    new, n_head, n_tail = compact_splice(blocks, 1, h23, [h(3), h(2), h(4)])
+    assert as_sets(new) == [(mask_of(1, 2, 3), {h12, h(3)}), (mask_of(2, 4), {h(2), h(4)})]
+    assert (n_head, n_tail) == (0, 0)
+    check_invariants(new)
+
+
+def test_only_h_old_in_block_merges_left():
+    h1, h12, h23, h4, h34 = h(1), h(1, 2), h(2, 3), h(4), h(3, 4)
+    blocks = compact([h1, h12, h23, h4, h34])
+
+    new, n_head, n_tail = compact_splice(blocks, 1, h12, [h(2)])
+    assert as_sets(new) == [
+        (mask_of(1, 2), {h1, h(2)}),
+        (mask_of(2, 3, 4), {h23, h4}), (mask_of(3, 4), {h34}),
+    ]
+    assert (n_head, n_tail) == (0, 2)
+    assert new[1:] == blocks[2:]
+    check_invariants(new)
+
+
+def test_zero_mask_duplicates_collapse_like_compact():
+    h0, h1 = h(), h(1)
+    blocks = compact([h0, h1])
+    new, _, _ = compact_splice(blocks, 0, h1, [h(), h(2)])
+    assert as_sets(new) == as_sets(compact([h0, h(), h(2)]))
+    assert len(new[0][1]) == 2
@@ -0,0 +1,49 @@
+import random
+from functools import reduce
+
+from tree_compiler.compiler import (
+    Hamiltonian, SearchNode, calculate_block_costs, calculate_g_cost, compact, get_neighbors,
+)
+from tree_compiler.operator import a, a_dag
+
+
+def leaf(*qumodes):
+    return Hamiltonian(expr=reduce(lambda x, y: x * y, [a(q) for q in qumodes]), is_leaf=True)
+
+
+def expandable(i, j):
+    # rule_7 可以分解的非叶节点 a_i a†_j^3 + h.c.
+    return Hamiltonian(expr=a(i) * a_dag(j) ** 3 + a(j) ** 3 * a_dag(i), is_leaf=False)
+
+
+def random_successors(n_states=300, seed=0):
+    """随机的多块状态 (第一个非叶节点位于任意位置) 经 get_neighbors 得到的子节点。"""
+    rng = random.Random(seed)
+    for _ in range(n_states):
+        hs = [leaf(*rng.sample(range(8), rng.randint(1, 2))) for _ in range(rng.randint(2, 7))]
+        for _ in range(rng.randint(1, 2)):
+            i, j = rng.sample(range(8), 2)
+            hs.insert(rng.randint(0, len(hs)), expandable(i, j))
+        blocks = compact(hs)
+        root = SearchNode(g_cost=calculate_g_cost(blocks), blocks=blocks)
+        yield from get_neighbors(root)
+
+
+def test_spliced_g_cost_matches_full_recompute():
+    n_children = n_multi_block = 0
+    for child in random_successors():
+        assert child.block_costs == calculate_block_costs(child.blocks)
+        assert child.g_cost == calculate_g_cost(child.blocks)
+        n_children += 1
+        n_multi_block += len(child.blocks) > 1
+    assert n_children > 100 and n_multi_block > 50
+
+
+def test_spliced_h_cost_matches_full_resum():
+    n_with_h = 0
+    for child in random_successors():
+        assert child.block_h == tuple(sum([H.h_est for H in hs], 0.0) for _, hs in child.blocks)
+        assert child.h_cost == sum([H.h_est for _, hs in child.blocks for H in hs], 0.0)
+        assert child.f_cost == child.g_cost + child.h_cost
+        n_with_h += child.h_cost > 0
+    assert n_with_h > 100
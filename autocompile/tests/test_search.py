@@ -0,0 +1,54 @@
+from tree_compiler import compiler
+from tree_compiler.compiler import T_MULTI, T_SINGLE, Hamiltonian, compact, find_optimal_path
+from tree_compiler.operator import ProductOp, SumOp, a
+
+
+# 仓库中的规则目前到不了全叶节点的目标状态，这里用三条形状规范的测试规则驱动真实的 A* 搜索
+def split_terms(H):
+    return [[Hamiltonian(expr=term) for term in H.expr.terms]]
+
+
+def native(H):
+    return [[Hamiltonian(expr=H.expr, is_leaf=True)]]
+
+
+def cut_factors(H):
+    return [[Hamiltonian(expr=f, is_leaf=True) for f in H.expr.factors]]
+
+
+def rules_for(H):
+    if isinstance(H.expr, SumOp):
+        return (split_terms,)
+    if isinstance(H.expr, ProductOp):
+        return (native, cut_factors)
+    return (native,)
+
+
+def path_of(node):
+    path = []
+    while node:
+        path.append(node)
+        node = node.parent
+    return path[::-1]
+
+
+def test_multi_h_root_end_to_end(monkeypatch):
+    monkeypatch.setattr(compiler, "get_applicable_rules", rules_for)
+    root = Hamiltonian(expr=a(0) * a(1) + a(1) * a(2) + a(3))
+    goal = find_optimal_path(root)
+
+    assert goal is not None and goal.h_cost == 0
+    path = path_of(goal)
+    # Start -> split_terms -> 两次 cut_factors -> native(a_3)
+    assert [step.rule_applied[0].__name__ for step in path[1:]] == [
+        "split_terms", "cut_factors", "cut_factors", "native"]
+    # 拆分后的后继同时持有多个 H，兄弟 H 不会在拼接时丢失
+    assert sum(len(hs) for _, hs in path[1].blocks) == 3
+    # 全部为单 qumode 门：a_0 a_1 | a_1 a_2 a_3，两个并行块
+    leaves = [H for _, hs in goal.blocks for H in hs]
+    assert sorted(repr(H) for H in leaves) == ["H(a_0)", "H(a_1)", "H(a_1)", "H(a_2)", "H(a_3)"]
+    assert all(H.is_leaf for H in leaves)
+    assert goal.g_cost == 2 * T_SINGLE
+    assert goal.g_cost < T_MULTI
+    # 此例中拼接得到的块划分恰好与 compact() 一致
+    assert goal.blocks == compact([Hamiltonian(expr=q, is_leaf=True) for q in (a(0), a(1), a(1), a(2), a(3))])
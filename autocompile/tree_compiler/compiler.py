@@ -1,27 +1,37 @@
-import heapq
-from dataclasses import dataclass, field
-from typing import List, Set, Tuple, Dict, Callable, FrozenSet, Optional
+from collections import deque
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import List, Set, Tuple, Dict, Callable, FrozenSet, Iterable, Optional
 # 导入本地 operator.py 中的符号算符系统
 from .operator import (
     SymbolicOperator, SumOp, ProductOp, Scalar, BosonicOp, PauliOp,GateOp,
-    CommutatorOp, AntiCommutatorOp, BOp, X, Y, Z, I, a, a_dag, extract_qumodes
+    CommutatorOp, AntiCommutatorOp, BOp, X, Y, Z, I, a, a_dag, S, extract_qumodes
 )
+import heapq
 import math
 
+# 算符都是不可变且可哈希的，因此可以直接以算符本身为键缓存其共轭转置；
+# 同一子树在 A* 扩展中会被反复 dagger，缓存后只计算一次。
+# 单独的标量不走缓存：Scalar(2) == Scalar(2.0) (以及 0.0 == -0.0) 但打印不同，
+# 共用缓存项会使结果的 repr 随调用顺序而变；而标量的共轭本身几乎没有开销。
 def dagger(op: SymbolicOperator) -> SymbolicOperator:
     """Compute the adjoint (dagger) of the operator."""
     if isinstance(op, Scalar):
-        return Scalar(op.value.conjugate())
-    elif isinstance(op, PauliOp):
+        return S(op.value.conjugate())
+    return _dagger(op)
+
+@lru_cache(maxsize=200_000)
+def _dagger(op: SymbolicOperator) -> SymbolicOperator:
+    if isinstance(op, PauliOp):
         return op  # Paulis are Hermitian
     elif isinstance(op, BosonicOp):
-        return BosonicOp(not op.is_creation, op.index)
+        return a(op.index) if op.is_creation else a_dag(op.index)
     elif isinstance(op, SumOp):
         return SumOp([dagger(term) for term in op.terms])
     elif isinstance(op, ProductOp):
         return ProductOp([dagger(f) for f in reversed(op.factors)])
     elif isinstance(op, CommutatorOp):
-        return CommutatorOp(dagger(op.B), dagger(op.A)) * Scalar(-1)
+        return CommutatorOp(dagger(op.B), dagger(op.A)) * S(-1)
     elif isinstance(op, AntiCommutatorOp):
         return AntiCommutatorOp(dagger(op.A), dagger(op.B))
     elif isinstance(op, GateOp):
@@ -35,7 +45,27 @@ def dagger(op: SymbolicOperator) -> SymbolicOperator:
 T_SINGLE = 20  # ns (单 qumode 门)
 T_MULTI = 700  # ns (多 qumode 门，取 400-1000ns 的平均值)
 
+def popcount(mask: int) -> int:
+    """qumode 位掩码中置位的个数，即涉及的 qumode 数 (int.bit_count 需要 Python 3.10)。"""
+    return bin(mask).count("1")
+
+def with_slots(cls):
+    """
+    以 dataclass 的字段为 __slots__ 重新创建该类，实例不再携带 __dict__。
+    等价于 Python 3.10 的 dataclass(slots=True)；项目需要支持 Python 3.8，因此手动实现。
+    """
+    cls_dict = dict(cls.__dict__)
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict['__slots__'] = field_names
+    for name in field_names:
+        # 字段默认值已记录在生成的 __init__ 中，类属性会与 slot 描述符冲突
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
 # --- 2. 基于 SymbolicOperator 的 Hamiltonian 包装类 ---
+@with_slots
 @dataclass(frozen=True)
 class Hamiltonian:
     """
@@ -43,95 +73,150 @@ class Hamiltonian:
     包含符号表达式、qumode 集合、执行代价等信息。
     """
     expr: SymbolicOperator  # 符号表达式
-    qumodes: FrozenSet[int] = field(init=False)  # 涉及的 Qumode 集合
     cost: int = 0  # 基础门的执行时间 (0 表示非基础门)
     is_leaf: bool = False  # 这是否是一个基础门 (叶节点)
     conditions: Dict[int, int] = field(default_factory=dict)  # qubit_index: initial_state (0 or 1)
+    qumode_mask: int = field(init=False, repr=False, compare=False)  # qumodes 的位掩码 (第 q 位对应 qumode q)
+    _hash: int = field(init=False, repr=False, compare=False)  # 构造时预先算好的哈希值
+    h_est: float = field(init=False, repr=False, compare=False)  # 预先算好的剩余代价估计 (叶节点为 0)
+    _split: Optional[Tuple[complex, SymbolicOperator]] = field(init=False, repr=False, compare=False)  # scalar_split 的缓存
     
     def __post_init__(self):
-        # 计算 qumodes 集合
-        qumodes_set = extract_qumodes(self.expr)
-        object.__setattr__(self, 'qumodes', frozenset(qumodes_set))
+        # 涉及的 qumode 只以位掩码保存，qumodes 集合按需由掩码还原
+        object.__setattr__(self, 'qumode_mask', sum(1 << q for q in extract_qumodes(self.expr)))
+        # slots 类的 init=False 字段没有类属性默认值，这里显式置空 scalar_split 缓存
+        object.__setattr__(self, '_split', None)
         
         # 如果是叶节点，计算代价
         if self.is_leaf:
             # 单 qumode 门 vs 多 qumode 门
-            if len(self.qumodes) <= 1:
+            if popcount(self.qumode_mask) <= 1:
                 object.__setattr__(self, 'cost', T_SINGLE)
             else:
                 object.__setattr__(self, 'cost', T_MULTI)
+
+        # Hamiltonian 不可变，哈希只在构造时计算一次
+        cond_tuple = tuple(sorted(self.conditions.items()))
+        object.__setattr__(self, '_hash', hash((hash(self.expr), self.qumode_mask, self.cost, self.is_leaf, cond_tuple)))
+
+        # 启发式估计只依赖于 H 本身，构造时算一次，供 SearchNode 直接累加
+        object.__setattr__(self, 'h_est', 0.0 if self.is_leaf else estimate_remaining_cost(self))
     
     def __repr__(self):
         cond_str = f", conditions={self.conditions}" if self.conditions else ""
         return f"H({self.expr}{cond_str})"
     
     def __eq__(self, other):
-        if not isinstance(other, Hamiltonian):
+        if self is other:
+            return True
+        if not isinstance(other, Hamiltonian) or self._hash != other._hash:
             return False
-        return (self.expr == other.expr and
-                self.qumodes == other.qumodes and
+        return ((self.expr is other.expr or self.expr == other.expr) and
+                self.qumode_mask == other.qumode_mask and
                 self.cost == other.cost and
                 self.is_leaf == other.is_leaf and
                 self.conditions == other.conditions)
     
     def __hash__(self):
-        cond_tuple = tuple(sorted(self.conditions.items()))
-        return hash((hash(self.expr), hash(self.qumodes), self.cost, self.is_leaf, cond_tuple))
+        return self._hash
+
+    @property
+    def qumodes(self) -> FrozenSet[int]:
+        """涉及的 Qumode 集合 (兼容旧接口，由 qumode_mask 按需还原)。"""
+        mask = self.qumode_mask
+        return frozenset(q for q in range(mask.bit_length()) if (mask >> q) & 1)
+
+    @property
+    def scalar_split(self) -> Tuple[complex, SymbolicOperator]:
+        """(标量因子, 剩余表达式)，首次访问时计算并缓存，供各条规则共用。"""
+        split = self._split
+        if split is None:
+            split = extract_scalar_factor(self.expr)
+            object.__setattr__(self, '_split', split)
+        return split
 
 # --- 3. 搜索节点 (Node) 的定义 ---
-@dataclass(order=True)
+@with_slots
+@dataclass
 class SearchNode:
-    """定义 A* 搜索树中的一个节点。"""
+    """
+    定义 A* 搜索树中的一个节点。
+    节点本身不可排序：open set 只按整数化的 f_cost 分桶，同一桶内先进先出，从不比较节点对象。
+    """
     
     f_cost: float = field(init=False)
+    h_cost: float = field(init=False, compare=False)  # 构造时算好的启发式代价
     g_cost: float = field(compare=False)
     
     # 状态：一个由"并行块"组成的列表
-    blocks: Tuple[FrozenSet[Hamiltonian], ...] = field(compare=False)
+    blocks: Tuple['Block', ...] = field(compare=False)
+    # 与 blocks 一一对应的块代价；为 None 时在构造时计算
+    block_costs: Optional[Tuple[float, ...]] = field(default=None, compare=False)
+    # 与 blocks 一一对应的块内启发式代价之和；为 None 时在构造时计算
+    block_h: Optional[Tuple[float, ...]] = field(default=None, compare=False)
     
     # 用于回溯路径
     parent: 'SearchNode' = field(default=None, compare=False)
-    rule_applied: str = field(default="Start", compare=False)
+    # (规则函数, 被分解的 H)；只在回溯最优路径时才格式化成字符串，根节点为 None
+    rule_applied: Optional[Tuple[Callable, 'Hamiltonian']] = field(default=None, compare=False)
+    _hash: int = field(init=False, repr=False, compare=False)
+    # 第一个待分解的 (块下标, H)；全部为叶节点时为 None
+    _first_nonleaf: Optional[Tuple[int, Hamiltonian]] = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
-        # f = g + h
-        self.f_cost = self.g_cost + self.calculate_h_cost()
+        if self.block_costs is None:
+            self.block_costs = calculate_block_costs(self.blocks)
+        if self.block_h is None:
+            self.block_h = tuple([block_h_cost(block) for block in self.blocks])
+        # f = g + h，h 只在构造时计算一次
+        self.h_cost = self.calculate_h_cost()
+        self.f_cost = self.g_cost + self.h_cost
+        self._first_nonleaf = next(
+            ((i, H) for i, (_, block) in enumerate(self.blocks) for H in block if not H.is_leaf), None)
+        # blocks 构造后不再修改，状态哈希只计算一次
+        self._hash = hash(self.blocks)
 
     def calculate_h_cost(self) -> float:
         """启发式函数 (h-cost): 估计剩余代价。"""
-        h = 0.0
-        for block in self.blocks:
-            for H in block:
-                if not H.is_leaf:
-                    # 基于表达式复杂度估计剩余代价
-                    h += estimate_remaining_cost(H)
-        return h
+        # 每个非叶节点 H 的估计值已在构造时缓存为 H.h_est (叶节点为 0)，
+        # 逐块的和在构造时算好或由父节点拼接得到 (都是整数值，求和顺序不影响结果)
+        return sum(self.block_h, 0.0)
+
+    @property
+    def rule_description(self) -> str:
+        if self.rule_applied is None:
+            return "Start"
+        rule_func, H = self.rule_applied
+        return f"{rule_func.__name__} on {H}"
 
     def __hash__(self):
-        return hash(self.blocks)
+        return self._hash
 
     def __eq__(self, other):
-        if not isinstance(other, SearchNode):
+        if self is other:
+            return True
+        if not isinstance(other, SearchNode) or self._hash != other._hash:
             return False
         return self.blocks == other.blocks
 
 # --- 4. 对易性检查 ---
+# 简化实现：在不相交的 qumode 上操作的 H 对易。H 与整块对易 <=> H.qumode_mask 与块掩码不相交，
+# compact / compact_splice 中直接按位与判断；算符之间的判断见 is_commutative。
 
-def check_commutativity(H1: Hamiltonian, H2: Hamiltonian) -> bool:
-    """
-    检查两个哈密顿量是否对易。
-    简化实现：如果它们在不相交的 qumode 上操作，则它们对易。
-    更复杂的对易性检查需要符号计算，这里使用简化版本。
-    """
-    return H1.qumodes.isdisjoint(H2.qumodes)
+# --- 5. 压缩逻辑 ---
 
-def check_commutativity_for_block(H: Hamiltonian, block: FrozenSet[Hamiltonian]) -> bool:
-    """检查一个 H 是否与一个块中的所有其他 H 都对易。"""
-    return all(check_commutativity(H, H_other) for H_other in block)
+# 并行块：(块内所有 H 的 qumode 掩码之并, 按哈希排序的 H 元组)。
+# 固定的块内顺序使相同的块总是得到相同的元组，状态哈希与比较都不依赖集合的迭代顺序。
+Block = Tuple[int, Tuple[Hamiltonian, ...]]
 
-# --- 5. 压缩逻辑 ---
+def make_block(hamiltonians: Iterable[Hamiltonian], mask: int) -> Block:
+    """
+    由一组互相对易的 H 及其掩码之并构造规范形式的块。
+    与 compact() 的集合语义一致，重复的 H 只保留一个 (只有掩码为 0 的 H 才可能在同一块中重复)。
+    """
+    return (mask, tuple(sorted(set(hamiltonians), key=hash)))
 
-def compact(hamiltonians: List[Hamiltonian]) -> Tuple[FrozenSet[Hamiltonian], ...]:
+def compact(hamiltonians: List[Hamiltonian]) -> Tuple[Block, ...]:
     """
     核心压缩逻辑：将一个扁平的 H 列表压缩成并行的块。
     使用贪心"向左合并"策略。
@@ -140,32 +225,107 @@ def compact(hamiltonians: List[Hamiltonian]) -> Tuple[FrozenSet[Hamiltonian], ..
         return tuple()
 
     blocks_list: List[Set[Hamiltonian]] = []
+    # block_masks[i] 是 blocks_list[i] 中所有 H 的 qumode 掩码之并；
+    # 与整块对易 <=> 与这个并集不相交，一次按位与即可判断
+    block_masks: List[int] = []
     assert isinstance(hamiltonians, list)
     for H in hamiltonians:
-        merged = False
+        mask = H.qumode_mask
         # 尝试合并到最后一个（即邻近的）块中
-        if blocks_list and check_commutativity_for_block(H, blocks_list[-1]):
+        if blocks_list and (mask & block_masks[-1]) == 0:
             blocks_list[-1].add(H)
-            merged = True
-        
-        if not merged:
+            block_masks[-1] |= mask
+        else:
             # 无法合并，创建新块
             blocks_list.append({H})
+            block_masks.append(mask)
             
-    # 转换为不可变的元组和 frozensets，使其可哈希
-    return tuple(frozenset(block) for block in blocks_list)
+    # 转换为不可变的 (掩码, H 元组)，使其可哈希
+    return tuple([make_block(block, mask) for block, mask in zip(blocks_list, block_masks)])
+
+def compact_splice(blocks: Tuple[Block, ...], block_idx: int,
+                   H_old: Hamiltonian, H_new_list: List[Hamiltonian]
+                   ) -> Tuple[Tuple[Block, ...], int, int]:
+    """
+    将 blocks[block_idx] 中的 H_old 替换为 H_new_list，只在拼接处重新压缩。
+    新的 H 按 compact() 同样的"向左合并"策略并入原块的剩余部分 (原块只剩 H_old 时并入左邻块)，
+    最后一个块再向右吸收与之不相交的后续块；其余块原样复用。
+    返回 (新块序列, 原样复用的前缀块数, 原样复用的后缀块数)。
 
-def calculate_g_cost(blocks: Tuple[FrozenSet[Hamiltonian], ...]) -> float:
+    注意：结果与对展开后的 H 列表调用 compact() *不一定相同*。
+    拼接点左侧的块 (左邻块除外) 从不重新合并；右侧的块只能整块并入，不会被拆开逐个合并；
+    块内 H 的先后顺序也不会像展开后那样重新参与贪心合并。
+    因此同一组 H 经不同的分解路径可能得到不同的块划分，搜索中会被当作不同的状态。
+    这是有意保留的：g_cost 是块划分 (即调度) 的函数而不只是 H 集合的函数，
+    之后的拼接也只与相邻块合并，不同划分的已花代价和后续可合并的机会都不同，
+    若按 H 集合去重反而可能丢掉更便宜的调度；代价只是多扩展一些节点。
+    get_neighbors 总是分解第一个非叶 H，拼接顺序是固定的，
+    只有不同规则产生相同的 H 集合时才会出现这种重复。
+    """
+    assert isinstance(H_new_list, list)
+    head = list(blocks[:block_idx])
+    rest = [H for H in blocks[block_idx][1] if H is not H_old]
+    if rest:
+        cur_mask = blocks[block_idx][0] & ~H_old.qumode_mask
+    elif head:
+        cur_mask, rest = head.pop()
+    else:
+        cur_mask = 0
+    cur: List[Hamiltonian] = list(rest)
+
+    new_blocks: List[Block] = []
+    for H in H_new_list:
+        mask = H.qumode_mask
+        if (mask & cur_mask) == 0:
+            cur.append(H)
+            cur_mask |= mask
+        else:
+            new_blocks.append(make_block(cur, cur_mask))
+            cur = [H]
+            cur_mask = mask
+
+    # 右侧接缝：后续块与当前块不相交时整体并入
+    tail = blocks[block_idx + 1:]
+    j = 0
+    while j < len(tail):
+        mask, block = tail[j]
+        if mask & cur_mask:
+            break
+        cur.extend(block)
+        cur_mask |= mask
+        j += 1
+    if cur:
+        new_blocks.append(make_block(cur, cur_mask))
+    return (*head, *new_blocks, *tail[j:]), len(head), len(tail) - j
+
+def block_cost(block: Block) -> float:
+    """块的代价 = 块中代价最大的那个门 (空块为 0)。"""
+    hs = block[1]
+    return max([H.cost for H in hs]) if hs else 0.0
+
+def block_h_cost(block: Block) -> float:
+    """块内所有 H 的剩余代价估计之和。"""
+    return sum([H.h_est for H in block[1]], 0.0)
+
+def splice_block_values(old: Tuple[float, ...], new_blocks: Tuple[Block, ...],
+                        n_head: int, n_tail: int, fn: Callable[[Block], float]) -> Tuple[float, ...]:
+    """
+    compact_splice 之后的逐块数值：前 n_head / 后 n_tail 个块原样复用，沿用 old 中的值，
+    只对拼接处的块调用 fn。
+    """
+    return (*old[:n_head],
+            *[fn(b) for b in new_blocks[n_head:len(new_blocks) - n_tail]],
+            *old[len(old) - n_tail:])
+
+def calculate_block_costs(blocks: Tuple[Block, ...]) -> Tuple[float, ...]:
+    """逐块计算代价。"""
+    return tuple([block_cost(block) for block in blocks])
+
+def calculate_g_cost(blocks: Tuple[Block, ...]) -> float:
     """
     (g-cost) 计算一个节点（块序列）的总执行时间。
     """
-    total_cost = 0.0
-    for block in blocks:
-        # 块的代价 = 块中代价最大的那个门
-        if block:
-            block_cost = max(H.cost for H in block)
-            total_cost += block_cost
-    return total_cost
+    return sum(calculate_block_costs(blocks), 0.0)
 
 # --- 6. 代价估计函数 ---
 
@@ -178,7 +338,7 @@ def estimate_remaining_cost(H: Hamiltonian) -> float:
     expr = H.expr
     
     # 如果涉及多个 qumode，可能需要多 qumode 门
-    num_qumodes = len(H.qumodes)
+    num_qumodes = popcount(H.qumode_mask)
     
     if num_qumodes == 0:
         return 0.0
@@ -191,10 +351,12 @@ def estimate_remaining_cost(H: Hamiltonian) -> float:
         complexity = estimate_complexity(expr)
         return complexity * T_MULTI
 
+@lru_cache(maxsize=None)
 def estimate_complexity(expr: SymbolicOperator) -> int:
     """
     估计表达式的复杂度（需要多少个多 qumode 门）。
     这是一个简化的启发式估计。
+    结果按子树缓存，递归时共享的子表达式只计算一次。
     """
     if isinstance(expr, (BosonicOp, PauliOp)):
         return 1
@@ -213,61 +375,30 @@ def estimate_complexity(expr: SymbolicOperator) -> int:
 
 # --- 7. 表达式模式匹配和辅助函数 ---
 
+@lru_cache(maxsize=None)
+def _qumode_mask(op: SymbolicOperator) -> int:
+    """算符涉及的 qumode 位掩码 (按算符缓存)。"""
+    return sum(1 << q for q in extract_qumodes(op))
+
 def is_commutative(M: SymbolicOperator, N: SymbolicOperator) -> bool:
     """
     检查两个算符是否对易。
-    简化实现：如果作用于不相交的 qumode 集合，则对易。
+    简化实现：如果作用于不相交的 qumode 集合，则对易 (一次位掩码与运算)；
+    共享 qumode 时保守地视为不对易 (Pauli 算符的 index 也按 qumode 计)。
     """
-    ## use numpy to check if the two operators are commutative
-    if isinstance(M, ProductOp):
-        for factor in M.factors:
-            if not is_commutative(factor, N):
-                return False
-        return True
-    elif isinstance(N, ProductOp):
-        for factor in N.factors:
-            if not is_commutative(M, factor):
-                return False
-        return True
-    elif isinstance(M, SumOp):
-        for term in M.terms:
-            if not is_commutative(term, N):
-                return False
-        return True
-    elif isinstance(N, SumOp):
-        for term in N.terms:
-            if not is_commutative(M, term):
-                return False
-        return True
-    else:
-        ## if M and N has different qumode then return true
-    # If M and N act on different qumodes, then they commute
-        def extract_qumodes(op):
-            if hasattr(op, "qumodes"):
-                return set(op.qumodes)
-            elif isinstance(op, (ProductOp, SumOp)):
-                # gather qumodes from all factors/terms
-                result = set()
-                elems = op.factors if isinstance(op, ProductOp) else op.terms
-                for elem in elems:
-                    result |= extract_qumodes(elem)
-                return result
-            else:
-                return set()
-        if extract_qumodes(M).isdisjoint(extract_qumodes(N)):
-            return True
-        # Fallback: by default assume they do not commute
-        return not dagger(M) == N
+    return (_qumode_mask(M) & _qumode_mask(N)) == 0
 
 def extract_scalar_factor(expr: SymbolicOperator) -> Tuple[complex, SymbolicOperator]:
     """
     从表达式中提取标量因子。
     返回 (标量值, 剩余表达式)
     """
-    if isinstance(expr, ProductOp) and len(expr.factors) > 0:
+    if not isinstance(expr, ProductOp):
+        return (1.0 + 0j, expr)
+    if len(expr.factors) > 0:
         first_factor = expr.factors[0]
         if isinstance(first_factor, Scalar):
-            remaining = ProductOp(expr.factors[1:]) if len(expr.factors) > 1 else Scalar(1.0)
+            remaining = ProductOp(expr.factors[1:]) if len(expr.factors) > 1 else S(1.0)
             return (first_factor.value, remaining)
     return (1.0 + 0j, expr)
 
@@ -280,37 +411,58 @@ def create_B_operator(A: SymbolicOperator, alpha: complex = 1.0 + 0j) -> Symboli
 
 # --- 8. 分解规则实现 ---
 
+@lru_cache(maxsize=None)
 def is_hermitian(op: SymbolicOperator) -> bool:
     """Check if operator is Hermitian (op == dagger(op))."""
+    # 叶子与部分组合算符可以按结构直接判断，省去构造 dagger(op) 再整树比较
+    if isinstance(op, PauliOp):
+        return True
+    if isinstance(op, BosonicOp):
+        return False
+    if isinstance(op, Scalar):
+        return op.value.imag == 0
+    if isinstance(op, SumOp):
+        # dagger 逐项进行且保持顺序，因此整体自伴 <=> 每一项都自伴
+        return all([is_hermitian(term) for term in op.terms])
+    if isinstance(op, AntiCommutatorOp):
+        return all([is_hermitian(op.A), is_hermitian(op.B)])
     return op == dagger(op)
 
+def clear_caches():
+    """清空 dagger / is_hermitian / extract_qumodes / _qumode_mask / _rules_for_expr / estimate_complexity 的缓存，避免缓存让上一次搜索的算符一直存活。"""
+    _dagger.cache_clear()
+    is_hermitian.cache_clear()
+    extract_qumodes.cache_clear()
+    _qumode_mask.cache_clear()
+    _rules_for_expr.cache_clear()
+    estimate_complexity.cache_clear()
+
 # Rule 1: exp(M t + N t) ≈ Trotter(M t, N t) -> (exp(M t / k) exp(N t / k))^k
 def rule_1_trotter(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if isinstance(inner, SumOp) and len(inner.terms) == 2:
         M_term, N_term = inner.terms
         # Assume scalar is t, but generalize
         k = 2  # Example k=2 for approximation
-        result = []
-        for _ in range(k):
-            result.append(Hamiltonian(expr=ProductOp([Scalar(scalar / k), M_term])))
-            result.append(Hamiltonian(expr=ProductOp([Scalar(scalar / k), N_term])))
-        return result
+        # 每一步的 Trotter 片段都相同，且算符不可变，构造一次后重复 k 次即可
+        step_scalar = S(scalar / k)
+        step = [Hamiltonian(expr=ProductOp((step_scalar, M_term))),
+                Hamiltonian(expr=ProductOp((step_scalar, N_term)))]
+        return step * k
     return []
 
 # Rule 2: exp([M t, N t]) ≈ exp(M t) exp(N t) exp(-M t) exp(-N t)
 def rule_2_bch(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if isinstance(inner, CommutatorOp):
         M = inner.A
         N = inner.B
         # Assume scalar is t
-        Mt = ProductOp([Scalar(scalar), M])
-        Nt = ProductOp([Scalar(scalar), N])
-        neg_Mt = ProductOp([Scalar(-scalar), M])
-        neg_Nt = ProductOp([Scalar(-scalar), N])
+        pos, neg = S(scalar), S(-scalar)
+        Mt = ProductOp((pos, M))
+        Nt = ProductOp((pos, N))
+        neg_Mt = ProductOp((neg, M))
+        neg_Nt = ProductOp((neg, N))
         return [[
             Hamiltonian(expr=Mt),
             Hamiltonian(expr=Nt),
@@ -321,23 +473,22 @@ def rule_2_bch(H: Hamiltonian) -> List[Hamiltonian]:
 
 # Rule 3: exp(t^2 [M, N]) -> exp([i t sigma_i N, i t sigma_i M]) if M, N Hermitian
 def rule_3(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if scalar.real > 0 and scalar.imag == 0 and isinstance(inner, CommutatorOp):
         M = inner.A
         N = inner.B
         if is_hermitian(M) and is_hermitian(N):
             t = scalar.real ** 0.5
+            it = S(1j * t)
             sigma_i = Y(0)  # Example, choose appropriate
-            it_sigma_N = ProductOp([Scalar(1j * t), sigma_i, N])
-            it_sigma_M = ProductOp([Scalar(1j * t), sigma_i, M])
+            it_sigma_N = ProductOp([it, sigma_i, N])
+            it_sigma_M = ProductOp([it, sigma_i, M])
             return [Hamiltonian(expr=CommutatorOp(it_sigma_N, it_sigma_M))]
     return []
 
 # Rule 4: exp(-i t^2 sigma_i {M, N}) -> exp([i t sigma_j M, i t sigma_k N]) if M, N Hermitian
 def rule_4(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if scalar == -1j and isinstance(inner, ProductOp) and len(inner.factors) == 2:
         sigma_i, anticom = inner.factors
         if isinstance(sigma_i, PauliOp) and isinstance(anticom, AntiCommutatorOp):
@@ -345,17 +496,17 @@ def rule_4(H: Hamiltonian) -> List[Hamiltonian]:
             N = anticom.B
             if is_hermitian(M) and is_hermitian(N):
                 t = 1.0  # Extract t^2 from scalar if needed
+                it = S(1j * t)
                 sigma_j = X(sigma_i.index)
                 sigma_k = Y(sigma_i.index)
-                it_sigma_j_M = ProductOp([Scalar(1j * t), sigma_j, M])
-                it_sigma_k_N = ProductOp([Scalar(1j * t), sigma_k, N])
+                it_sigma_j_M = ProductOp([it, sigma_j, M])
+                it_sigma_k_N = ProductOp([it, sigma_k, N])
                 return [Hamiltonian(expr=CommutatorOp(it_sigma_j_M, it_sigma_k_N))]
     return []
 
 # Rule 5: exp(-i t^2 sigma_z [M, N]) -> exp([i t N, i t sigma_z M])
 def rule_5(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     M = None
     N = None
     sigma_z = None
@@ -375,15 +526,15 @@ def rule_5(H: Hamiltonian) -> List[Hamiltonian]:
         conditions = {qubit_idx: 0}
     if M is not None and N is not None and scalar == -1j:
         t = 1.0  # Adjust for t^2
-        it_N = ProductOp([Scalar(1j * t), N])
-        it_sigma_M = ProductOp([Scalar(1j * t), sigma_z, M])
+        it = S(1j * t)
+        it_N = ProductOp([it, N])
+        it_sigma_M = ProductOp([it, sigma_z, M])
         return [Hamiltonian(expr=CommutatorOp(it_N, it_sigma_M), conditions=conditions)]
     return []
 
 # Rule 6: exp(t^2 sigma_z (M N - (M N)†)) -> exp([X i t B_N X, i t B_M]) if [M,N]=0
 def rule_6(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     matched = False
     sigma_z = None
     conditions = {}
@@ -400,22 +551,22 @@ def rule_6(H: Hamiltonian) -> List[Hamiltonian]:
         matched = True
     if matched and isinstance(diff, SumOp) and len(diff.terms) == 2:
         term1, term2 = diff.terms
-        if term2 == dagger(term1) * Scalar(-1):
+        if term2 == dagger(term1) * S(-1):
             if isinstance(term1, ProductOp) and len(term1.factors) == 2:
                 M, N = term1.factors
                 if is_commutative(M, N):
                     t = scalar.real ** 0.5
-                    B_M = create_B_operator(M, Scalar(1.0))
-                    B_N = create_B_operator(N, Scalar(1.0))
-                    it_B_M = ProductOp([Scalar(1j * t), B_M])
-                    X_it_B_N_X = ProductOp([X(sigma_z.index), Scalar(1j * t), B_N, X(sigma_z.index)])
+                    it = S(1j * t)
+                    B_M = create_B_operator(M, S(1.0))
+                    B_N = create_B_operator(N, S(1.0))
+                    it_B_M = ProductOp([it, B_M])
+                    X_it_B_N_X = ProductOp([X(sigma_z.index), it, B_N, X(sigma_z.index)])
                     return [Hamiltonian(expr=CommutatorOp(X_it_B_N_X, it_B_M), conditions=conditions)]
     return []
 
 # Rule 7: exp(i t^2 sigma_z (M N + (M N)†)) -> exp([S i t B_M S†, X i t B_N X]) if [M,N]=0
 def rule_7(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     matched = False
     sigma_z = None
     conditions = {}
@@ -443,63 +594,63 @@ def rule_7(H: Hamiltonian) -> List[Hamiltonian]:
                     if is_commutative(M, N):
 
                         t = scalar.real ** 0.5
-                        B_M = create_B_operator(M, Scalar(1.0))
-                        B_N = create_B_operator(N, Scalar(1.0))
-                        S = GateOp('S', sigma_z.index)  # Placeholder for S gate
-                        S_dag = dagger(S)
-                        S_it_B_M_Sdag = ProductOp([S, Scalar(1j * t), B_M, S_dag])
-                        X_it_B_N_X = ProductOp([X(sigma_z.index), Scalar(1j * t), B_N, X(sigma_z.index)])
+                        it = S(1j * t)
+                        B_M = create_B_operator(M, S(1.0))
+                        B_N = create_B_operator(N, S(1.0))
+                        S_gate = GateOp('S', sigma_z.index)  # Placeholder for S gate
+                        S_dag = dagger(S_gate)
+                        S_it_B_M_Sdag = ProductOp([S_gate, it, B_M, S_dag])
+                        X_it_B_N_X = ProductOp([X(sigma_z.index), it, B_N, X(sigma_z.index)])
                         results.append([Hamiltonian(expr=CommutatorOp(S_it_B_M_Sdag, X_it_B_N_X), conditions=conditions)])
                 return results
     return []
 
 # Rule 8: exp(-2 i t (MN 0 ; 0 -MN)) -> exp(-i t sigma_z [M,N] - i t sigma_z {M,N}) if M,N Hermitian
 def rule_8(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if scalar == -2j and isinstance(inner, SumOp) and len(inner.terms) == 2:
         term1, term2 = inner.terms
-        if isinstance(term1, ProductOp) and isinstance(term2, ProductOp) and term2 == term1 * Scalar(-1):  # Simulate diag
+        if isinstance(term1, ProductOp) and isinstance(term2, ProductOp) and term2 == term1 * S(-1):  # Simulate diag
             MN = term1
             if isinstance(MN, ProductOp) and len(MN.factors) == 2:
                 M, N = MN.factors
                 if is_hermitian(M) and is_hermitian(N):
                     t = 1.0  # Assume t in scalar
+                    neg_it = S(-1j * t)
                     qubit_idx = 0
                     sigma_z = Z(qubit_idx)
                     comm = CommutatorOp(M, N)
                     anticom = AntiCommutatorOp(M, N)
-                    part1 = ProductOp([Scalar(-1j * t), sigma_z, comm])
-                    part2 = ProductOp([Scalar(-1j * t), sigma_z, anticom])
+                    part1 = ProductOp([neg_it, sigma_z, comm])
+                    part2 = ProductOp([neg_it, sigma_z, anticom])
                     return [Hamiltonian(expr=SumOp([part1, part2]), conditions={qubit_idx: 0})]
     return []
 
 # Rule 9: exp(2 i t^2 (MN 0 ; 0 -MN)) -> exp([S i t B_M S†, X i t B_N X]) if [M,N]=0 and MN = (MN)†
 def rule_9(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if scalar == 2j and isinstance(inner, SumOp) and len(inner.terms) == 2:
         term1, term2 = inner.terms
-        if isinstance(term1, ProductOp) and term2 == term1 * Scalar(-1):
+        if isinstance(term1, ProductOp) and term2 == term1 * S(-1):
             MN = term1
             if MN == dagger(MN) and isinstance(MN, ProductOp) and len(MN.factors) == 2:
                 M, N = MN.factors
                 if is_commutative(M, N):
                     t = 1.0
-                    B_M = create_B_operator(M, Scalar(1.0))
-                    B_N = create_B_operator(N, Scalar(1.0))
+                    it = S(1j * t)
+                    B_M = create_B_operator(M, S(1.0))
+                    B_N = create_B_operator(N, S(1.0))
                     qubit_idx = 0
-                    S = Z(qubit_idx)
-                    S_dag = dagger(S)
-                    S_it_B_M_Sdag = ProductOp([S, Scalar(1j * t), B_M, S_dag])
-                    X_it_B_N_X = ProductOp([X(qubit_idx), Scalar(1j * t), B_N, X(qubit_idx)])
+                    S_gate = Z(qubit_idx)
+                    S_dag = dagger(S_gate)
+                    S_it_B_M_Sdag = ProductOp([S_gate, it, B_M, S_dag])
+                    X_it_B_N_X = ProductOp([X(qubit_idx), it, B_N, X(qubit_idx)])
                     return [Hamiltonian(expr=CommutatorOp(S_it_B_M_Sdag, X_it_B_N_X))]
     return []
 
 # Rule 10: exp(2 i t B_MN) -> X exp(t sigma_y (MN - (MN)†) + i t sigma_x (MN + (MN)†)) X if [M,N]=0
 def rule_10(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if isinstance(inner, ProductOp):  # Assume inner is B_MN
         # Extract M, N from B
         if len(inner.factors) == 3 and isinstance(inner.factors[1], BOp):
@@ -518,10 +669,10 @@ def rule_10(H: Hamiltonian) -> List[Hamiltonian]:
                         qubit_idx = 0
                         X_gate = X(qubit_idx)
                         MN = ProductOp([M, N])
-                        diff = SumOp([MN, dagger(MN) * Scalar(-1)])
+                        diff = SumOp([MN, dagger(MN) * S(-1)])
                         summ = SumOp([MN, dagger(MN)])
-                        part1 = ProductOp([Scalar(t), Y(qubit_idx), diff])
-                        part2 = ProductOp([Scalar(1j * t), X(qubit_idx), summ])
+                        part1 = ProductOp([S(t), Y(qubit_idx), diff])
+                        part2 = ProductOp([S(1j * t), X(qubit_idx), summ])
                         middle = SumOp([part1, part2])
                         if gate.op_type == 'X':
                             results.append([Hamiltonian(expr=middle)])
@@ -532,41 +683,40 @@ def rule_10(H: Hamiltonian) -> List[Hamiltonian]:
 
 # Rule 11: exp(i t (2 MN 0 ; 0 -N M - (N M)†)) -> exp([S i t B_M S†, X i t B_N X]) if MN = (MN)†
 def rule_11(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if scalar == 1j and isinstance(inner, SumOp) and len(inner.terms) == 2:
         term1, term2 = inner.terms
-        if isinstance(term1, ProductOp) and term1.factors[0] == Scalar(2):
+        if isinstance(term1, ProductOp) and term1.factors[0] == S(2):
             MN = term1.factors[1]
-            if isinstance(term2, SumOp) and term2.terms[0] == MN * Scalar(-1) and term2.terms[1] == dagger(MN) * Scalar(-1):
+            if isinstance(term2, SumOp) and term2.terms[0] == MN * S(-1) and term2.terms[1] == dagger(MN) * S(-1):
                 if MN == dagger(MN):
                     # Extract M, N assuming MN = M * N, but N M = N * M if commutative
                     if isinstance(MN, ProductOp) and len(MN.factors) == 2:
                         M, N = MN.factors
                         t = 1.0
-                        B_M = create_B_operator(M, Scalar(1.0))
-                        B_N = create_B_operator(N, Scalar(1.0))
+                        it = S(1j * t)
+                        B_M = create_B_operator(M, S(1.0))
+                        B_N = create_B_operator(N, S(1.0))
                         qubit_idx = 0
-                        S = Z(qubit_idx)
-                        S_dag = dagger(S)
-                        S_it_B_M_Sdag = ProductOp([S, Scalar(1j * t), B_M, S_dag])
-                        X_it_B_N_X = ProductOp([X(qubit_idx), Scalar(1j * t), B_N, X(qubit_idx)])
+                        S_gate = Z(qubit_idx)
+                        S_dag = dagger(S_gate)
+                        S_it_B_M_Sdag = ProductOp([S_gate, it, B_M, S_dag])
+                        X_it_B_N_X = ProductOp([X(qubit_idx), it, B_N, X(qubit_idx)])
                         return [Hamiltonian(expr=CommutatorOp(S_it_B_M_Sdag, X_it_B_N_X))]
     return []
 
 # Rule 12: B_a = exp(2 i alpha (0 a ; a† 0)) -> sequence if alpha = alpha*
 def rule_12(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if scalar == 2j and isinstance(inner, SumOp) and len(inner.terms) == 2:
         term1, term2 = inner.terms
         if term1 == a(0) and term2 == a_dag(0):  # Simplify index 0
             alpha = 1.0  # Extract from scalar if needed
             if alpha == alpha.conjugate():
-                phase1 = ProductOp([Scalar(1j * (math.pi / 2)), a_dag(0), a(0)])
-                disp_y = ProductOp([Scalar(1j * alpha), SumOp([a_dag(0), a(0)]), Y(0)])
-                phase2 = ProductOp([Scalar(-1j * (math.pi / 2)), a_dag(0), a(0)])
-                disp_x = ProductOp([Scalar(1j * alpha), SumOp([a_dag(0), a(0)]), X(0)])
+                phase1 = ProductOp([S(1j * (math.pi / 2)), a_dag(0), a(0)])
+                disp_y = ProductOp([S(1j * alpha), SumOp([a_dag(0), a(0)]), Y(0)])
+                phase2 = ProductOp([S(-1j * (math.pi / 2)), a_dag(0), a(0)])
+                disp_x = ProductOp([S(1j * alpha), SumOp([a_dag(0), a(0)]), X(0)])
                 return [
                     Hamiltonian(expr=phase1),
                     Hamiltonian(expr=disp_y),
@@ -577,17 +727,16 @@ def rule_12(H: Hamiltonian) -> List[Hamiltonian]:
 
 # Rule 13: Similar to 12 but for a†
 def rule_13(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if scalar == 2j and isinstance(inner, SumOp) and len(inner.terms) == 2:
         term1, term2 = inner.terms
         if term1 == a_dag(0) and term2 == a(0):
             alpha = 1.0
             if alpha == alpha.conjugate():
-                phase1 = ProductOp([Scalar(1j * (math.pi / 2)), a_dag(0), a(0)])
-                disp_y = ProductOp([Scalar(1j * alpha), SumOp([a_dag(0), a(0)]), Y(0)])
-                phase2 = ProductOp([Scalar(-1j * (math.pi / 2)), a_dag(0), a(0)])
-                disp_x = ProductOp([Scalar(-1j * alpha), SumOp([a_dag(0), a(0)]), X(0)])
+                phase1 = ProductOp([S(1j * (math.pi / 2)), a_dag(0), a(0)])
+                disp_y = ProductOp([S(1j * alpha), SumOp([a_dag(0), a(0)]), Y(0)])
+                phase2 = ProductOp([S(-1j * (math.pi / 2)), a_dag(0), a(0)])
+                disp_x = ProductOp([S(-1j * alpha), SumOp([a_dag(0), a(0)]), X(0)])
                 return [
                     Hamiltonian(expr=phase1),
                     Hamiltonian(expr=disp_y),
@@ -608,15 +757,14 @@ def rule_14(H: Hamiltonian) -> List[Hamiltonian]:
                     alpha = term1.factors[0].value
                     # Assume term2 = - conj(alpha) * a_k, check if matches
                     conj_alpha = alpha.conjugate()
-                    if isinstance(term2, ProductOp) and term2.factors[0] == Scalar(-conj_alpha) and isinstance(term2.factors[1], BosonicOp) and not term2.factors[1].is_creation and term2.factors[1].index == term1.factors[1].index:
+                    if isinstance(term2, ProductOp) and term2.factors[0] == S(-conj_alpha) and isinstance(term2.factors[1], BosonicOp) and not term2.factors[1].is_creation and term2.factors[1].index == term1.factors[1].index:
                         # Decomposition is complex; return placeholder for RHS of Eq (11)
                         return [Hamiltonian(expr=expr, is_leaf=True)]  # Mark as leaf if native
     return []
 
 # Rule 15: exp(2 i alpha^2 P1 P2 ... Pn) -> multi-Pauli exponential
 def rule_15(H: Hamiltonian) -> List[Hamiltonian]:
-    expr = H.expr
-    scalar, inner = extract_scalar_factor(expr)
+    scalar, inner = H.scalar_split
     if scalar == 2j and isinstance(inner, ProductOp) and all(isinstance(f, PauliOp) for f in inner.factors):
         # Decomposition to RHS of Eq (9); assume it's leaf or specific sequence
         return [Hamiltonian(expr=inner, is_leaf=True)]
@@ -667,110 +815,146 @@ def sigma_z_conversion(H: Hamiltonian) -> List[Hamiltonian]:
 # --- 9. 规则调度器 ---
 
 # 规则查找表：根据表达式类型决定可应用的规则
-def get_applicable_rules(H: Hamiltonian) -> List[Callable[[Hamiltonian], List[Hamiltonian]]]:
-    """
-    根据哈密顿量的表达式类型，返回可应用的分解规则列表。
-    """
+# 每种表达式类型注册一个匹配函数，返回该类型下可应用的规则；
+# 未注册的类型 (Pauli、Bosonic、Scalar 等叶子) 直接查表得到空列表。
+RuleFn = Callable[[Hamiltonian], List[Hamiltonian]]
+_RULE_TABLE: Dict[type, Callable[[SymbolicOperator], List[RuleFn]]] = {}
+
+def _rules_for(op_type: type):
+    """注册 op_type 类型表达式的规则匹配函数。"""
+    def register(matcher):
+        _RULE_TABLE[op_type] = matcher
+        return matcher
+    return register
+
+@_rules_for(SumOp)
+def _sum_rules(expr: SumOp) -> List[RuleFn]:
     rules = []
-    expr = H.expr
-    
     # Rule 1: Trotter（适用于 SumOp）
-    if isinstance(expr, SumOp):
-        if len(expr.terms) == 2:
-            H_1, H_2 = expr.terms
-            ## check if H_1 and H_2 are Hermitian
-            if is_hermitian(H_1) and is_hermitian(H_2):
-                rules.append(rule_1_trotter)
-            elif H_1 == dagger(H_2):
-                ## check if H_1 and H_2 are basic gates
-                
-                if len(H_1.factors) <= 2:
-                    ## H_1 +H_2 is a basic gate
-                    rules.append(rule_16)
-                    return rules
-                else:
-                    ## split H_1 and H_2 into two parts
-                    rules.append(rule_7)
-            elif H_1 == - dagger(H_2):
-                if len(H_1.factors) > 2:
-                    rules.append(rule_6)
-        elif len(expr.terms) % 2 == 1:
-            all_hermitian = True
-            for term in expr.terms:
-                if not is_hermitian(term):
-                    all_hermitian = False
-                    break
-            if all_hermitian:
-                rules.append(rule_1_trotter)
-        
-    
+    if len(expr.terms) == 2:
+        H_1, H_2 = expr.terms
+        ## check if H_1 and H_2 are Hermitian
+        if is_hermitian(H_1) and is_hermitian(H_2):
+            rules.append(rule_1_trotter)
+        elif H_1 == dagger(H_2):
+            ## check if H_1 and H_2 are basic gates
+            
+            if len(H_1.factors) <= 2:
+                ## H_1 +H_2 is a basic gate
+                rules.append(rule_16)
+            else:
+                ## split H_1 and H_2 into two parts
+                rules.append(rule_7)
+        elif H_1 == - dagger(H_2):
+            if len(H_1.factors) > 2:
+                rules.append(rule_6)
+    elif len(expr.terms) % 2 == 1:
+        all_hermitian = True
+        for term in expr.terms:
+            if not is_hermitian(term):
+                all_hermitian = False
+                break
+        if all_hermitian:
+            rules.append(rule_1_trotter)
+    return rules
+
+@_rules_for(CommutatorOp)
+def _commutator_rules(expr: CommutatorOp) -> List[RuleFn]:
     # Rule 2: BCH（适用于 CommutatorOp）
-    if isinstance(expr, CommutatorOp):
-        rules.append(rule_2_bch)
-    
-    # # Rule 3: 对易子分解（适用于 CommutatorOp）
-    # if isinstance(expr, CommutatorOp):
-    #     rules.append(rule_3)
-    
-    # # Rule 4: 反对易子分解（适用于 AntiCommutatorOp）
-    # if isinstance(expr, AntiCommutatorOp):
-    #     rules.append(rule_4)
-    
-    # # Rule 5: sigma_z 对易子（需要模式匹配）
-    # # 简化：如果表达式包含对易子，尝试应用
-    # if isinstance(expr, CommutatorOp):
-    #     rules.append(rule_5)
-    
-    # Rule 8, 9: 矩阵形式（需要模式匹配）
-    # 简化实现
-    
+    # Rule 3 (对易子分解) 与 Rule 5 (sigma_z 对易子) 同样适用于 CommutatorOp，暂未启用
+    return [rule_2_bch]
+
+@_rules_for(ProductOp)
+def _product_rules(expr: ProductOp) -> List[RuleFn]:
+    rules = []
     # Rule 10: B 算符（需要模式匹配）
-    if isinstance(expr, ProductOp):
-        contain_B = False
-        for factor in expr.factors:
-            if isinstance(factor, BOp):
-                contain_B = True
-                break
-        if contain_B:
+    for factor in expr.factors:
+        if isinstance(factor, BOp):
             rules.append(rule_10)
-    # Rule 11: 矩阵形式
-    # 简化实现
-    
-    # Rule 12, 13: B_a 和 B_{a^dagger}（需要模式匹配）
-    # 简化实现
-    
-    # Rule 14, 15: 多 qubit 控制和多 Pauli（需要模式匹配）
-    # 简化实现
-    
-    # Rule 16: 原生门转换（适用于简单表达式）
-    # if len(H.qumodes) <= 2:
-    #     rules.append(rule_16)
-    
+            break
     # sigma_z 转换（适用于包含 Pauli 算符的表达式）
     # 检查是否包含 X 或 Y Pauli 算符
-    if isinstance(expr, ProductOp) and len(expr.factors) == 2 and isinstance(expr.factors[0], PauliOp) and isinstance(expr.factors[1], PauliOp) and expr.factors[0].op_type in ['X', 'Y'] and expr.factors[1].op_type in ['X', 'Y']:
+    if len(expr.factors) == 2 and isinstance(expr.factors[0], PauliOp) and isinstance(expr.factors[1], PauliOp) and expr.factors[0].op_type in ['X', 'Y'] and expr.factors[1].op_type in ['X', 'Y']:
         rules.append(sigma_z_conversion)
-    
     return rules
 
+# Rule 4 (反对易子分解，AntiCommutatorOp)、Rule 8, 9, 11 (矩阵形式)、Rule 12, 13 (B_a 和 B_{a^dagger})、
+# Rule 14, 15 (多 qubit 控制和多 Pauli) 需要模式匹配，暂未注册
+
+@lru_cache(maxsize=None)
+def _rules_for_expr(expr: SymbolicOperator) -> Tuple[RuleFn, ...]:
+    """按表达式缓存匹配结果：规则只依赖于不可变的表达式本身。"""
+    matcher = _RULE_TABLE.get(type(expr))
+    if matcher is None:
+        return ()
+    return tuple(matcher(expr))
+
+def get_applicable_rules(H: Hamiltonian) -> Tuple[RuleFn, ...]:
+    """
+    根据哈密顿量的表达式类型，返回可应用的分解规则 (同一表达式只匹配一次)。
+    """
+    return _rules_for_expr(H.expr)
+
 def contains_pauli(expr: SymbolicOperator, pauli_types: List[str]) -> bool:
     """
     检查表达式是否包含指定类型的 Pauli 算符。
+    用显式栈遍历，找到第一个匹配即返回。
     """
-    if isinstance(expr, PauliOp):
-        return expr.op_type in pauli_types
-    elif isinstance(expr, SumOp):
-        return any(contains_pauli(term, pauli_types) for term in expr.terms)
-    elif isinstance(expr, ProductOp):
-        return any(contains_pauli(factor, pauli_types) for factor in expr.factors)
-    elif isinstance(expr, CommutatorOp):
-        return contains_pauli(expr.A, pauli_types) or contains_pauli(expr.B, pauli_types)
-    elif isinstance(expr, AntiCommutatorOp):
-        return contains_pauli(expr.A, pauli_types) or contains_pauli(expr.B, pauli_types)
+    types = frozenset(pauli_types)
+    stack = [expr]
+    pop, push, extend = stack.pop, stack.append, stack.extend
+    while stack:
+        e = pop()
+        if isinstance(e, PauliOp):
+            if e.op_type in types:
+                return True
+        elif isinstance(e, SumOp):
+            extend(e.terms)
+        elif isinstance(e, ProductOp):
+            extend(e.factors)
+        elif isinstance(e, (CommutatorOp, AntiCommutatorOp)):
+            push(e.A)
+            push(e.B)
     return False
 
 # --- 10. 核心 A* 搜索 ---
 
+class BucketQueue:
+    """
+    以整数 f_cost 为键的桶式优先队列 (bucket queue)。
+    代价都是 T_SINGLE / T_MULTI 的整数倍，不同的 f 值很少：
+    已有桶的 push 为 O(1)，只有出现新的 f 值或某个桶被取空时才需要 O(log K) 的堆操作
+    (K 为不同 f 值的个数；加权 A* 下 K 可能较大，用堆而不是每次 min() 扫描所有键)。
+    同一个桶内按先进先出 (FIFO) 出队。
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, deque] = {}
+        self.keys: List[int] = []  # 非空桶的键组成的最小堆
+        self.size = 0
+
+    def push(self, key: int, item) -> None:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = deque()
+            heapq.heappush(self.keys, key)
+        bucket.append(item)
+        self.size += 1
+
+    def pop(self):
+        key = self.keys[0]
+        bucket = self.buckets[key]
+        item = bucket.popleft()
+        self.size -= 1
+        if not bucket:
+            del self.buckets[key]
+            heapq.heappop(self.keys)
+        return item
+
+    def __len__(self) -> int:
+        return self.size
+
+
 def get_neighbors(node: SearchNode) -> List[SearchNode]:
     """
     A* 的核心 "expand" 函数。
@@ -778,89 +962,92 @@ def get_neighbors(node: SearchNode) -> List[SearchNode]:
     """
     neighbors: List[SearchNode] = []
    
-    # 1. 找到第一个要分解的 H
-    H_to_expand: Optional[Hamiltonian] = None
-    target_block_index: int = -1   
-    # 遍历所有块和块中的所有 H
-    for i, block in enumerate(node.blocks):
-        for H in block:
-            if not H.is_leaf:
-                H_to_expand = H
-                target_block_index = i
-                break
-        if H_to_expand:
-            break
-            
-    # 如果没有找到（即所有都是叶节点），则返回空列表
-    if not H_to_expand:
+    # 1. 第一个要分解的 H 已在节点构造时找到
+    # 如果没有（即所有都是叶节点），则返回空列表
+    if node._first_nonleaf is None:
         return []
+    target_block_index, H_to_expand = node._first_nonleaf
 
-    # 2. 将 blocks 展平回一个 H 列表
-    flat_H_list: List[Hamiltonian] = []
-    H_index_in_flat_list = -1
-    
-    current_index = 0
-    for i, block in enumerate(node.blocks):
-        for H in block:
-            if H == H_to_expand:
-                H_index_in_flat_list = current_index
-            flat_H_list.append(H)
-            current_index += 1
-
-    # 3. 应用所有适用规则
+    # 2. 应用所有适用规则
     applicable_rules = get_applicable_rules(H_to_expand)
+    costs, h_parts = node.block_costs, node.block_h
     
     for rule_func in applicable_rules:
-        # 4. 生成新的 H 列表
+        # 3. 用规则产生的片段替换 H_to_expand，只在拼接处重新压缩
         new_H_fragments = rule_func(H_to_expand)
         for new_H_fragment in new_H_fragments:
             if not new_H_fragment:
                 continue
-            new_blocks = compact(new_H_fragment)
-            new_g_cost = calculate_g_cost(new_blocks)
+            new_blocks, n_head, n_tail = compact_splice(
+                node.blocks, target_block_index, H_to_expand, new_H_fragment)
+            # 只有拼接处的块需要重新计算 g / h，前后原样复用的块沿用父节点的结果
+            new_costs = splice_block_values(costs, new_blocks, n_head, n_tail, block_cost)
             new_node = SearchNode(
-                g_cost=new_g_cost,
+                g_cost=sum(new_costs, 0.0),
                 blocks=new_blocks,
+                block_costs=new_costs,
+                block_h=splice_block_values(h_parts, new_blocks, n_head, n_tail, block_h_cost),
                 parent=node,
-                rule_applied=f"{rule_func.__name__} on {H_to_expand}"
+                rule_applied=(rule_func, H_to_expand)
             )
             neighbors.append(new_node)
     return neighbors
 
-def find_optimal_path(root_H: Hamiltonian) -> Optional[SearchNode]:
-    """A* 搜索算法主循环。"""
-    
+def find_optimal_path(root_H: Hamiltonian, weight: float = 1.0) -> Optional[SearchNode]:
+    """A* 搜索算法主循环。
+
+    weight > 1 时为加权 A* (f = g + weight * h)：扩展的节点更少，
+    但找到的路径代价最多为最优解的 weight 倍。默认 1.0 即标准 A*。
+    """
+    clear_caches()
+    try:
+        return _search(root_H, weight)
+    finally:
+        # 搜索结束后不再需要这些缓存，立即释放其中的算符
+        clear_caches()
+
+def _search(root_H: Hamiltonian, weight: float) -> Optional[SearchNode]:
     # 根节点是包含 root_H 的单个块
-    root_blocks = (frozenset[Hamiltonian]({root_H}),)
-    root_g_cost = calculate_g_cost(root_blocks)
-    root_node = SearchNode(g_cost=root_g_cost, blocks=root_blocks)
+    root_blocks = (make_block((root_H,), root_H.qumode_mask),)
+    root_costs = calculate_block_costs(root_blocks)
+    root_node = SearchNode(g_cost=sum(root_costs, 0.0), blocks=root_blocks, block_costs=root_costs)
 
-    open_set = [root_node]  # 优先队列 (min-heap)
-    visited = {root_node.blocks}  # 存储已访问的 *状态* (blocks)
+    # 优先队列 (按整数 f_cost 分桶)
+    open_set = BucketQueue()
+    open_set.push(int(round(root_node.g_cost + weight * root_node.h_cost)), root_node)
+    # 每个 *状态* (blocks) 目前已知的最小 g_cost
+    best_g: Dict[SearchNode, float] = {root_node: root_node.g_cost}
+
+    # 主循环每轮都会用到的方法和常量绑定为局部变量，省去重复的属性/全局查找
+    push, pop, best_g_get = open_set.push, open_set.pop, best_g.get
+    expand, inf = get_neighbors, math.inf
 
     iteration = 0
     
     while open_set:
-        iteration += 1
-        
         # 1. 获取 f_cost 最低的节点
-        current_node = heapq.heappop(open_set)
+        current_node = pop()
+
+        # 跳过过期条目：之后已经找到了到达同一状态的更短路径
+        if current_node.g_cost > best_g[current_node]:
+            continue
+
+        iteration += 1
         
         # 2. 检查是否为目标
         # 我们的目标是 h_cost = 0 (所有 H 都是叶节点)
-        if current_node.calculate_h_cost() == 0:
+        if current_node.h_cost == 0:
             print(f"\n--- 搜索成功！在 {iteration} 次迭代后找到最优路径 ---")
             return current_node
             
         # 3. 扩展邻居
-        for neighbor in get_neighbors(current_node):
+        for neighbor in expand(current_node):
             
-            # 检查是否已经访问过这个 *状态*
-            if neighbor.blocks not in visited:
-                
-                # 添加到 open set 和 visited
-                heapq.heappush(open_set, neighbor)
-                visited.add(neighbor.blocks)
+            # 只有找到到达该 *状态* 的更短路径时才 (重新) 加入 open set
+            g_cost = neighbor.g_cost
+            if g_cost < best_g_get(neighbor, inf):
+                best_g[neighbor] = g_cost
+                push(int(round(g_cost + weight * neighbor.h_cost)), neighbor)
                 
         if iteration > 5000:  # 防止无限循环
             print("搜索超时！")
@@ -880,11 +1067,11 @@ def reconstruct_path(node: SearchNode):
     print(f"\n--- 最终代价 (时间): {path[0].g_cost} ns ---")
     print("\n--- 分解路径 (逆序) ---")
     for i, step in enumerate(reversed(path)):
-        print(f"\n步骤 {i}: {step.rule_applied}")
+        print(f"\n步骤 {i}: {step.rule_description}")
         print(f"  g_cost (so far): {step.g_cost} ns")
-        print(f"  h_cost (est.): {step.calculate_h_cost()} ns")
+        print(f"  h_cost (est.): {step.h_cost} ns")
         print("  状态 (并行块):")
-        for block in step.blocks:
-            print(f"    {block}")
+        for _, block in step.blocks:
+            print(f"    {frozenset(block)}")
 
 
@@ -1,6 +1,8 @@
 import abc
+import math
 from dataclasses import dataclass
-from typing import List, Union, Tuple
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Union, Tuple
 from zlib import DEF_BUF_SIZE
 
 # --- 1. 抽象基类 (Abstract Base Class) ---
@@ -12,6 +14,8 @@ class SymbolicOperator(abc.ABC):
     """
     哈密顿量符号系统的抽象基类。
     """
+    # 基类不引入 __dict__，SumOp / ProductOp 才能真正只使用 __slots__
+    __slots__ = ()
 
     @abc.abstractmethod
     def __repr__(self) -> str:
@@ -25,37 +29,43 @@ class SymbolicOperator(abc.ABC):
 
     def __add__(self, other):
         # H1 + H2
-        other = _ensure_op(other)
+        if other.__class__ not in _OP_TYPES:
+            other = _ensure_op(other)
         return SumOp([self, other])
 
     def __radd__(self, other):
         # 5 + H1
-        other = _ensure_op(other)
+        if other.__class__ not in _OP_TYPES:
+            other = _ensure_op(other)
         return SumOp([other, self])
 
     def __sub__(self, other):
         # H1 - H2  ->  H1 + (-1 * H2)
-        other = _ensure_op(other)
-        return SumOp([self, ProductOp([Scalar(-1.0), other])])
+        if other.__class__ not in _OP_TYPES:
+            other = _ensure_op(other)
+        return SumOp([self, ProductOp([S(-1.0), other])])
 
     def __rsub__(self, other):
         # 5 - H1  ->  5 + (-1 * H1)
-        other = _ensure_op(other)
-        return SumOp([other, ProductOp([Scalar(-1.0), self])])
+        if other.__class__ not in _OP_TYPES:
+            other = _ensure_op(other)
+        return SumOp([other, ProductOp([S(-1.0), self])])
 
     def __mul__(self, other):
         # H1 * H2
-        other = _ensure_op(other)
+        if other.__class__ not in _OP_TYPES:
+            other = _ensure_op(other)
         return ProductOp([self, other])
 
     def __rmul__(self, other):
         # 5 * H1
-        other = _ensure_op(other)
+        if other.__class__ not in _OP_TYPES:
+            other = _ensure_op(other)
         return ProductOp([other, self])
         
     def __neg__(self):
         # -H1 -> -1 * H1
-        return ProductOp([Scalar(-1.0), self])
+        return ProductOp([S(-1.0), self])
 
     # --- 对易/反对易方法 (Commutator Methods) ---
 
@@ -67,15 +77,23 @@ class SymbolicOperator(abc.ABC):
         """计算 {self, other}"""
         return AntiCommutatorOp(self, _ensure_op(other))
 
+# 已确认是 SymbolicOperator 的具体类。运算符重载先查这个集合，
+# 命中时 (绝大多数情况) 连 _ensure_op 和 ABC 的 isinstance 都不用调用。
+_OP_TYPES = set()
+
 def _ensure_op(val: Union['SymbolicOperator', complex, int, float]) -> 'SymbolicOperator':
     """
     一个辅助函数，确保参与运算的项都是 SymbolicOperator。
     如果输入是数字，它会将其包装成 Scalar 算符。
     """
+    cls = val.__class__
+    if cls in _OP_TYPES:
+        return val
     if isinstance(val, SymbolicOperator):
+        _OP_TYPES.add(cls)
         return val
     if isinstance(val, (int, float, complex)):
-        return Scalar(complex(val))
+        return S(complex(val))
     return NotImplemented
 
 
@@ -96,6 +114,12 @@ class Scalar(SymbolicOperator):
     def __repr__(self) -> str:
         return f"{self.value}"
 
+    def __eq__(self, other):
+        # 驻留的常量标量 (见 S) 可直接按身份比较
+        if self is other:
+            return True
+        return other.__class__ is Scalar and self.value == other.value
+
 @dataclass(frozen=True)
 class PauliOp(SymbolicOperator):
     """
@@ -117,13 +141,13 @@ class PauliOp(SymbolicOperator):
 
         if exponent == 0:
             # P^0 = 1 (identity)
-            return Scalar(1.0)
+            return S(1.0)
         elif exponent == 1:
             # P^1 = P
             return self
         elif exponent % 2 == 0:
             # For Pauli operators: X^2 = Y^2 = Z^2 = I, and I^even = I
-            return PauliOp('I', self.index)
+            return I(self.index)
         else:
             # For odd exponents > 1, we need to multiply
             return ProductOp([self] * exponent)
@@ -143,7 +167,7 @@ class GateOp(SymbolicOperator):
         if not isinstance(exponent, int) or exponent < 0:
             raise ValueError("Exponent must be a non-negative integer")
         if exponent == 0:
-            return Scalar(1.0)
+            return S(1.0)
         elif exponent == 1:
             return self
         else:
@@ -178,7 +202,7 @@ class BosonicOp(SymbolicOperator):
 
         if exponent == 0:
             # a^0 = 1 (identity)
-            return Scalar(1.0)
+            return S(1.0)
         elif exponent == 1:
             # a^1 = a
             return self
@@ -200,25 +224,34 @@ class SumOp(SymbolicOperator):
     代表多个算符的加和。
     例如: H1 + H2 + H3
     """
+    __slots__ = ('terms', '_hash')
+
     def __init__(self, terms: List[SymbolicOperator]):
         flat_terms = []
+        # 构造在 A* 中极为频繁：绑定局部方法，按类型身份判断 (SumOp 没有子类)
+        append, extend = flat_terms.append, flat_terms.extend
         for t in terms:
-            if isinstance(t, SumOp):
+            if t.__class__ is SumOp:
                 # 扁平化: (A + B) + C  ->  A + B + C
-                flat_terms.extend(t.terms)
+                extend(t.terms)
             else:
-                flat_terms.append(t)
+                append(t)
         # 使用 tuple 确保不可变性
         self.terms: Tuple[SymbolicOperator, ...] = tuple(flat_terms)
+        # 不可变，哈希只需计算一次
+        self._hash = hash(self.terms)
 
     def __repr__(self) -> str:
         return f"({' + '.join(map(str, self.terms))})"
         
     # --- 为不可变性和字典使用提供支持 ---
     def __hash__(self):
-        return hash(self.terms)
+        return self._hash
     def __eq__(self, other):
-        return isinstance(other, SumOp) and self.terms == other.terms
+        # 同一对象直接相等；哈希已缓存，不同哈希可立即判定不等，无需逐层比较子树
+        if self is other:
+            return True
+        return other.__class__ is SumOp and self._hash == other._hash and self.terms == other.terms
 
 ## substract operation
 
@@ -228,34 +261,43 @@ class ProductOp(SymbolicOperator):
     代表多个算符的乘积 (顺序敏感)。
     例如: H1 * H2 * H3
     """
+    __slots__ = ('factors', '_hash')
+
     def __init__(self, factors: List[SymbolicOperator]):
         flat_factors = []
+        append, extend = flat_factors.append, flat_factors.extend
         total_scalar = 1.0 + 0j
         
         for f in factors:
-            if isinstance(f, ProductOp):
+            cls = f.__class__
+            if cls is ProductOp:
                 # 扁平化: (A * B) * C  ->  A * B * C
-                flat_factors.extend(f.factors)
-            elif isinstance(f, Scalar):
+                extend(f.factors)
+            elif cls is Scalar:
                 # 合并标量: (c1 * A) * c2 -> (c1*c2) * A
                 total_scalar *= f.value
             else:
-                flat_factors.append(f)
+                append(f)
 
         # 将合并后的标量放在最前面
-        if total_scalar == 1.0 and len(flat_factors) > 0:
-             self.factors: Tuple[SymbolicOperator, ...] = tuple(flat_factors)
+        if total_scalar == 1.0 and flat_factors:
+             factors_tuple = tuple(flat_factors)
         else:
-             self.factors: Tuple[SymbolicOperator, ...] = (Scalar(total_scalar), *flat_factors)
+             factors_tuple = (S(total_scalar), *flat_factors)
+        self.factors: Tuple[SymbolicOperator, ...] = factors_tuple
+        # 不可变，哈希只需计算一次
+        self._hash = hash(factors_tuple)
 
     def __repr__(self) -> str:
         return f"({' * '.join(map(str, self.factors))})"
 
     # --- 为不可变性和字典使用提供支持 ---
     def __hash__(self):
-        return hash(self.factors)
+        return self._hash
     def __eq__(self, other):
-        return isinstance(other, ProductOp) and self.factors == other.factors
+        if self is other:
+            return True
+        return other.__class__ is ProductOp and self._hash == other._hash and self.factors == other.factors
 
 @dataclass(frozen=True)
 class CommutatorOp(SymbolicOperator):
@@ -293,62 +335,88 @@ class BOp(SymbolicOperator):
         if not isinstance(exponent, int) or exponent < 0:
             raise ValueError("Exponent must be a non-negative integer")
         if exponent == 0:
-            return Scalar(1.0)
+            return S(1.0)
         elif exponent == 1:
             return self
 
 # --- 辅助函数 (Helper Functions) ---
+# 叶子算符不可变且取值空间很小，每个 (类型, 下标) 只创建一个实例 (flyweight)，
+# 之后的比较多半可以按身份直接得出结果。
+@lru_cache(maxsize=None)
 def X(i: int) -> PauliOp:
     return PauliOp('X', i)
 
+@lru_cache(maxsize=None)
 def Y(i: int) -> PauliOp:
     return PauliOp('Y', i)
 
+@lru_cache(maxsize=None)
 def Z(i: int) -> PauliOp:
     return PauliOp('Z', i)
 
 
 
+@lru_cache(maxsize=None)
 def I(i: int) -> PauliOp:
     return PauliOp('I', i)
 
+@lru_cache(maxsize=None)
 def a(i: int) -> BosonicOp:
     return BosonicOp(is_creation=False, index=i)
 
+@lru_cache(maxsize=None)
 def a_dag(i: int) -> BosonicOp:
     return BosonicOp(is_creation=True, index=i)
 
+# --- 辅助函数：常用标量的驻留 ---
+# 规则中反复出现的 0, ±1, ±i, ±2, ±2i, ±π/2, ±iπ/2 只保留一个 Scalar 实例。
+# 缓存键带上类型和零分量的符号 (0.0 == -0.0 但打印不同)，
+# 保证 S(x) 与 Scalar(x) 的字符串表示完全一致。
+_INTERNED_SCALARS = frozenset([0, 1, -1, 1j, -1j, 2, -2, 2j, -2j,
+                               math.pi / 2, -math.pi / 2, 1j * math.pi / 2, -1j * math.pi / 2])
+_SCALAR_CACHE: Dict[tuple, Scalar] = {}
+
+def S(val: complex) -> Scalar:
+    """构造标量算符；常用常量返回缓存中的同一实例。"""
+    if val.__class__ is complex:
+        key = (complex, val, math.copysign(1.0, val.real), math.copysign(1.0, val.imag))
+    else:
+        key = (val.__class__, val, math.copysign(1.0, val))
+    s = _SCALAR_CACHE.get(key)
+    if s is None:
+        s = Scalar(val)
+        if val in _INTERNED_SCALARS:
+            _SCALAR_CACHE[key] = s
+    return s
+
 # --- 辅助函数：提取 qumode 集合 ---
-def extract_qumodes(op: SymbolicOperator) -> set:
+# 算符不可变且可哈希，结果按算符缓存：每棵子树只遍历一次。
+# 返回 frozenset，避免调用方修改缓存中的结果。
+@lru_cache(maxsize=None)
+def extract_qumodes(op: SymbolicOperator) -> FrozenSet[int]:
     """
     从符号算符中提取所有涉及的 qumode 索引集合。
     用于判断两个算符是否对易（作用于不同的 qumode 集合时对易）。
     """
     qumodes = set()
-    
-    if isinstance(op, BosonicOp):
-        qumodes.add(op.index)
-    elif isinstance(op, PauliOp):
-        # Pauli 算符作用于 qubit，但在这个系统中我们可能需要将其映射到 qumode
-        # 这里假设 Pauli 的 index 就是 qumode index
-        qumodes.add(op.index)
-    elif isinstance(op, Scalar):
+    # 显式栈代替递归：所有子树共用一个集合，没有逐层的函数调用和 frozenset 分配
+    stack = [op]
+    pop, push, extend = stack.pop, stack.append, stack.extend
+    while stack:
+        e = pop()
+        if isinstance(e, (BosonicOp, PauliOp)):
+            # Pauli 算符作用于 qubit，这里假设 Pauli 的 index 就是 qumode index
+            qumodes.add(e.index)
+        elif isinstance(e, SumOp):
+            extend(e.terms)
+        elif isinstance(e, ProductOp):
+            extend(e.factors)
+        elif isinstance(e, (CommutatorOp, AntiCommutatorOp)):
+            push(e.A)
+            push(e.B)
         # 标量不涉及任何 qumode
-        pass
-    elif isinstance(op, SumOp):
-        for term in op.terms:
-            qumodes.update(extract_qumodes(term))
-    elif isinstance(op, ProductOp):
-        for factor in op.factors:
-            qumodes.update(extract_qumodes(factor))
-    elif isinstance(op, CommutatorOp):
-        qumodes.update(extract_qumodes(op.A))
-        qumodes.update(extract_qumodes(op.B))
-    elif isinstance(op, AntiCommutatorOp):
-        qumodes.update(extract_qumodes(op.A))
-        qumodes.update(extract_qumodes(op.B))
     
-    return qumodes
+    return frozenset(qumodes)
 
 # --- 示例代码（已注释，避免导入时执行） ---
 # if __name__ == "__main__":
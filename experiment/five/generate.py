@@ -1,7 +1,38 @@
 import pandas as pd
-import itertools
 import re
 
+
+def next_permutation(a: bytearray) -> bool:
+    """原地把 a 变为字典序的下一个排列 (Knuth 算法 L)。
+
+    可处理重复元素：从升序排列开始，多重集的每个不同排列恰好访问一次。
+    a 已是最后一个 (非递增) 排列时返回 False。
+    Genesis/scripts/generate.py 中有一份相同的副本，修改时需同步。
+    """
+    j = len(a) - 2
+    while j >= 0 and a[j] >= a[j + 1]:
+        j -= 1
+    if j < 0:
+        return False
+    l = len(a) - 1
+    while a[j] >= a[l]:
+        l -= 1
+    a[j], a[l] = a[l], a[j]
+    a[j + 1:] = a[:j:-1]
+    return True
+
+
+def distinct_permutations(elements):
+    """按字典序产出 elements 的所有不重复排列 (每个排列为 tuple)。"""
+    # 对排序后符号的小整数编码做排列，而不是直接排列字符串
+    symbols = sorted(set(elements))
+    perm = bytearray(sorted(symbols.index(x) for x in elements))
+    while True:
+        yield tuple(map(symbols.__getitem__, perm))
+        if not next_permutation(perm):
+            break
+
+
 # 1. 读取原始数据
 # 直接读取为 DataFrame，不需要先转成 string
 input_file_path = 'experiment/four/result_logic_[abcd].csv'
@@ -34,12 +65,12 @@ for index, row in df.iterrows():
     # 加入 '-0'
     elements.append('-0')
     
-    # 生成所有不重复的排列
-    unique_permutations = sorted(list(set(itertools.permutations(elements))))
+    # 生成所有不重复的排列（输入排序后按字典序直接产出，无需 set 去重）
+    unique_permutations = distinct_permutations(sorted(elements))
     
     # 3. 处理排列并收集数据
     for p in unique_permutations:
-        new_key = "[" + "".join(p) + "]"
+        new_key = "".join(["[", *p, "]"])
         
         # 创建一个用于去重的标识 (Key + 指标值)
         # 将 list 转换为 tuple 才能放入 set 中
@@ -1,8 +1,12 @@
 import os
 import numpy as np
 import sys
-import pandas as pd
+import csv
+import re
+import json
 import ast  # 用于安全解析文本中的列表字符串
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 # 导入自定义模块
 try:
@@ -19,54 +23,89 @@ except ImportError as e:
     print(f"详细信息: {e}")
     sys.exit(1)
 
-def parse_txt_params(txt_path):
+# 预编译: 整个文件一次性匹配, 避免逐行 startswith
+# 捕获组对应原先 split(":")[1] / split("=")[1] 的片段
+_PID_RE = re.compile(r'^[ \t]*问题编号[^:\n]*:([^:\n]*)', re.M)
+_CN_RE = re.compile(r'^[ \t]*(约束数[^:\n]*:([^:\n]*)[^\n]*)', re.M)
+_A_RE = re.compile(r'^[ \t]*约束矩阵 A[^=\n]*=([^=\n]*)', re.M)
+
+def parse_txt_params(txt_path, log=print):
     """
     解析 problem_params.txt 文件
     提取: 问题编号, 约束数, 约束矩阵 A
+    警告与错误信息交给 log 输出 (子进程中传入日志列表的 append，由主进程按顺序打印)
     """
     problem_id = 0
     constraint_num = 0  # 初始化约束数
     A_matrix = None
     
     try:
-        with open(txt_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                
-                # 提取问题编号
-                if line.startswith("问题编号"):
-                    parts = line.split(":")
-                    if len(parts) > 1:
-                        problem_id = int(parts[1].strip())
-
-                # ================= 新增: 提取约束数 =================
-                elif line.startswith("约束数"):
-                    # 假设格式为 "约束数: 2"
-                    parts = line.split(":")
-                    if len(parts) > 1:
-                        try:
-                            constraint_num = int(parts[1].strip())
-                        except ValueError:
-                            print(f"  警告: 无法解析约束数: {line}")
-                # ===================================================
-                        
-                # 提取矩阵 A
-                elif line.startswith("约束矩阵 A"):
-                    parts = line.split("=")
-                    if len(parts) > 1:
-                        matrix_str = parts[1].strip()
-                        try:
-                            list_data = ast.literal_eval(matrix_str)
-                            A_matrix = np.array(list_data)
-                        except:
-                            print(f"  警告: 无法解析矩阵字符串: {matrix_str}")
+        with open(txt_path, 'rb') as f:
+            text = f.read().decode('utf-8')
+
+        # 与逐行解析一致: 多次出现时以最后一行为准
+        for pid_str in _PID_RE.findall(text):
+            problem_id = int(pid_str.strip())
+
+        for cn_line, cn_str in _CN_RE.findall(text):
+            try:
+                constraint_num = int(cn_str.strip())
+            except ValueError:
+                log(f"  警告: 无法解析约束数: {cn_line.strip()}")
+
+        for matrix_str in _A_RE.findall(text):
+            matrix_str = matrix_str.strip()
+            try:
+                # json 比 ast 快; 非 JSON 写法 (如元组) 再交给 ast
+                try:
+                    list_data = json.loads(matrix_str)
+                except ValueError:
+                    list_data = ast.literal_eval(matrix_str)
+                A_matrix = np.array(list_data)
+            except:
+                log(f"  警告: 无法解析矩阵字符串: {matrix_str}")
                             
     except Exception as e:
-        print(f"  读取文件出错: {e}")
+        log(f"  读取文件出错: {e}")
         return None, None, None
 
     return problem_id, constraint_num, A_matrix
 
+def process_one_file(txt_path):
+    """
+    处理单个 problem_params.txt (在子进程中运行，各文件之间互不依赖):
+    解析 TXT 并计算 Kernel 向量。
+    返回 (Problem_ID, 约束数, [(Vector_Index, vec), ...], 日志行列表)
+    """
+    logs = []
+
+    # 3. 解析 TXT 获取 A, Problem_ID 和 约束数
+    p_id, c_num, A_matrix = parse_txt_params(txt_path, log=logs.append)
+    
+    if A_matrix is None:
+        logs.append("  -> 跳过: 未找到矩阵 A 或解析失败")
+        return p_id, c_num, [], logs
+    
+    if A_matrix.ndim == 1:
+        A_matrix = A_matrix.reshape(1, -1)
+    
+    vectors = []
+    try:
+        # 4. 计算 Kernel 向量
+        basis_vectors = compute_integer_nullspace(A_matrix)
+        
+        # 5. 收集待预测的向量
+        for idx, vec in enumerate(basis_vectors):
+            if len(vec) != 5:
+                logs.append(f"    -> 跳过: 向量维度 {len(vec)} 不等于 5")
+                continue
+            vectors.append((idx + 1, vec))
+
+    except Exception as ex:
+        logs.append(f"  -> 计算出错: {ex}")
+
+    return p_id, c_num, vectors, logs
+
 def process_txt_and_predict(root_data_dir, model_csv_path, output_csv_path):
     # 1. 初始化预测器
     print(f"正在初始化预测模型 (CSV路径: {model_csv_path})...")
@@ -83,97 +122,80 @@ def process_txt_and_predict(root_data_dir, model_csv_path, output_csv_path):
     print("模型加载完成。开始扫描 .txt 文件 (5变量版本 + 约束数提取)...")
     print("="*60)
 
-    all_results = []
-    file_count = 0
-        
+    # 先收集所有文件的 kernel 向量，最后统一批量预测
+    records = []  # (Problem_ID, Constraint_Num, Vector_Index, vec)
+
     # 2. 遍历文件夹
-    for dirpath, dirnames, filenames in os.walk(root_data_dir):
-        target_file = 'problem_params.txt'
-        
-        if target_file in filenames:
-            txt_path = os.path.join(dirpath, target_file)
-            file_count += 1
+    target_file = 'problem_params.txt'
+    txt_paths = [os.path.join(dirpath, target_file)
+                 for dirpath, dirnames, filenames in os.walk(root_data_dir)
+                 if target_file in filenames]
+
+    # 各文件的解析 + 零空间计算互相独立，交给进程池并行处理；
+    # map 按提交顺序返回结果，日志与结果顺序和串行版本一致
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(process_one_file, txt_paths, chunksize=8)
+        for file_count, (txt_path, (p_id, c_num, vectors, logs)) in enumerate(zip(txt_paths, results), 1):
             print(f"处理文件 [{file_count}]: {txt_path}")
-            
-            # 3. 解析 TXT 获取 A, Problem_ID 和 约束数
-            p_id, c_num, A_matrix = parse_txt_params(txt_path)
-            
-            if A_matrix is None:
-                print("  -> 跳过: 未找到矩阵 A 或解析失败")
-                continue
-            
-            if A_matrix.ndim == 1:
-                A_matrix = A_matrix.reshape(1, -1)
-            
-            try:
-                # 4. 计算 Kernel 向量
-                basis_vectors = compute_integer_nullspace(A_matrix)
-                
-                # 5. 预测并收集结果
-                for idx, vec in enumerate(basis_vectors):
-                    if len(vec) != 5:
-                        print(f"    -> 跳过: 向量维度 {len(vec)} 不等于 5")
-                        continue
-                    
-                    a, b, c, d, e_val = vec
-                    
-                    res = predictor.predict(a, b, c, d, e_val)
-                    
-                    row_data = {
-                        'Problem_ID': p_id,
-                        'Constraint_Num': c_num,  # 保存约束数
-                        'Vector_Index': idx + 1,
-                        'a': a, 'b': b, 'c': c, 'd': d, 'e': e_val,
-                        'Single_Gate': res.get('single_gate'),
-                        'Two_Gate': res.get('two_gate'),
-                        'Total_Gate': res.get('total_gate'),
-                        'Depth': res.get('depth'),
-                        'Latency': res.get('latency')
-                    }
-                    all_results.append(row_data)
-                    print(f"    -> Vec {idx+1}: {vec} | Total: {res.get('total_gate')}")
-
-            except Exception as ex:
-                print(f"  -> 计算出错: {ex}")
+            for line in logs:
+                print(line)
+            records.extend((p_id, c_num, idx, vec) for idx, vec in vectors)
 
     print("="*60)
     
-    if not all_results:
+    if not records:
         print("未生成任何结果数据。")
         return
 
-    # 6. 处理数据并保存 (详细版)
+    # 6. 一次性批量预测所有向量 (N, 5)
+    vectors = np.array([r[3] for r in records])
+    # 跨文件重复出现的 (a, b, c, d, e) 向量只预测一次。
+    # 以完整向量为键，不依赖预测器内部用了哪些特征
+    unique_vecs, inverse = np.unique(vectors, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    unique_preds = predictor.predict_batch(unique_vecs)
+    preds = {metric: [values[i] for i in inverse] for metric, values in unique_preds.items()}
+    print(f"共 {len(vectors)} 个向量，去重后实际预测 {len(unique_vecs)} 个")
+    for (p_id, _, idx, vec), total in zip(records, preds['total_gate']):
+        print(f"    -> Problem {p_id} Vec {idx}: {vec} | Total: {total}")
+
+    # 7. 保存详细数据：按 Problem_ID 和 Vector_Index 排序后逐行写出 CSV，
+    #    同一趟里累加聚合值，不再构造中间的 DataFrame
     print("正在处理和保存详细数据...")
-    df = pd.DataFrame(all_results)
-    
-    # 排序
-    df['Problem_ID'] = pd.to_numeric(df['Problem_ID'], errors='coerce').fillna(0).astype(int)
-    
-    # 定义列顺序，把 Constraint_Num 加进去
-    cols_order = ['Problem_ID', 'Constraint_Num', 'Vector_Index', 
-                  'a', 'b', 'c', 'd', 'e', 
-                  'Single_Gate', 'Two_Gate', 'Total_Gate', 'Depth', 'Latency']
-    
-    # 确保列存在再排序
-    existing_cols = [c for c in cols_order if c in df.columns]
-    df = df[existing_cols]
-    
-    # 按 Problem_ID 和 Vector_Index 排序
-    df = df.sort_values(by=['Problem_ID', 'Vector_Index'], ascending=[True, True])
-    
-    df.to_csv(output_csv_path, index=False, encoding='utf-8')
+    header = ['Problem_ID', 'Constraint_Num', 'Vector_Index', 
+              'a', 'b', 'c', 'd', 'e', 
+              'Single_Gate', 'Two_Gate', 'Total_Gate', 'Depth', 'Latency']
+    metrics = ['single_gate', 'two_gate', 'total_gate', 'depth', 'latency']
+
+    # 稳定排序，与 DataFrame.sort_values 的多列排序结果一致
+    row_order = sorted(range(len(records)), key=lambda i: (records[i][0], records[i][2]))
+
+    # 按 Problem_ID 和 Constraint_Num 分组累加 [Depth, Single_Gate, Two_Gate] (缺失值按 0 计)
+    # 这样 Constraint_Num 会保留在结果中（因为它对同一个 Problem_ID 是唯一的）
+    agg = defaultdict(lambda: [0, 0, 0])
+
+    with open(output_csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator=os.linesep)  # 与 DataFrame.to_csv 的换行一致
+        writer.writerow(header)
+        for i in row_order:
+            p_id, c_num, idx, _ = records[i]
+            single, two, total, depth, latency = [preds[m][i] for m in metrics]
+            writer.writerow([p_id, c_num, idx, *vectors[i].tolist(), single, two, total, depth, latency])
+
+            acc = agg[(p_id, c_num)]
+            acc[0] += depth or 0
+            acc[1] += single or 0
+            acc[2] += two or 0
     print(f"详细结果已保存至: {output_csv_path}")
 
-    # 7. 生成聚合版 (Problem_ID 相加)
+    # 8. 生成聚合版 (Problem_ID 相加)
     print("正在生成聚合数据 (Sum by Problem_ID)...")
-    cols_to_sum = ['Depth', 'Single_Gate', 'Two_Gate']
-    
-    # 修改聚合逻辑：按 Problem_ID 和 Constraint_Num 分组
-    # 这样 Constraint_Num 会保留在结果中（因为它对同一个 Problem_ID 是唯一的）
-    df_agg = df.groupby(['Problem_ID', 'Constraint_Num'])[cols_to_sum].sum().reset_index()
-    
     agg_csv_path = output_csv_path.replace('.csv', '_aggregated.csv')
-    df_agg.to_csv(agg_csv_path, index=False, encoding='utf-8')
+    with open(agg_csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(['Problem_ID', 'Constraint_Num', 'Depth', 'Single_Gate', 'Two_Gate'])
+        for (p_id, c_num), sums in sorted(agg.items()):
+            writer.writerow([p_id, c_num, *sums])
     print(f"聚合结果已保存至: {agg_csv_path}")
 
 if __name__ == "__main__":
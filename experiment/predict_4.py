@@ -130,16 +130,54 @@ class HighPrecisionQuantumPredictor:
                 
         return result
 
+    def predict_batch(self, vectors):
+        """
+        批量预测: vectors 为形状 (N, 4) 的整数数组。
+        返回 {metric: 长度为 N 的列表}，与逐个调用 predict 的结果一致 (无模型时为 None)。
+        """
+        if not self.is_trained: return {}
+
+        V = np.abs(np.asarray(vectors, dtype=float))
+        nz_mask = V != 0
+
+        # 1. 向量化提取特征 (与 _get_features 相同: Order / NZ_Count / 非零绝对值的总体标准差)
+        order = V.sum(axis=1)
+        nz_count = nz_mask.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = order / nz_count
+            var = np.where(nz_mask, (V - mean[:, None]) ** 2, 0.0).sum(axis=1) / nz_count
+        std_val = np.where(nz_count > 1, np.sqrt(var), 0.0)
+
+        # 2. 按非零个数分组，每组只调用一次模型
+        result = {}
+        for metric in self.metrics:
+            values = [None] * len(V)
+            for nz, model_info in self.models.get(metric, {}).items():
+                rows = np.nonzero(nz_count == nz)[0]
+                if len(rows) == 0: continue
+                params = model_info['params']
+
+                if model_info['type'] == 'simple':
+                    pred_val = self._model_simple(order[rows], *params)
+                else:
+                    pred_val = self._model_dual((order[rows], std_val[rows]), *params)
+
+                for i, v in zip(rows, np.round(pred_val)):
+                    values[i] = int(v)
+            result[metric] = values
+
+        return result
+
 # ================= 验证脚本 =================
 
-predictor = HighPrecisionQuantumPredictor()
-
-if predictor.is_trained:
-    res = predictor.predict(-5, 0 ,0, 0)
-    print(f"   Single Gate: {res.get('single_gate')}")
-    print(f"   Two Gate:    {res.get('two_gate')}")
-    print(f"   Total Gate:  {res.get('total_gate')}")
-    print(f"   Depth:       {res.get('depth')}")
-    print(f"   Latency:     {res.get('latency')}")
-    
-   
\ No newline at end of file
+# 只在直接运行本文件时训练并演示；被 main.py 导入 (包括进程池子进程重新导入) 时不执行
+if __name__ == "__main__":
+    predictor = HighPrecisionQuantumPredictor()
+
+    if predictor.is_trained:
+        res = predictor.predict(-5, 0 ,0, 0)
+        print(f"   Single Gate: {res.get('single_gate')}")
+        print(f"   Two Gate:    {res.get('two_gate')}")
+        print(f"   Total Gate:  {res.get('total_gate')}")
+        print(f"   Depth:       {res.get('depth')}")
+        print(f"   Latency:     {res.get('latency')}")
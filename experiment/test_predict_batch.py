@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+import pytest
+
+import predict_4
+import predict_5
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _random_vectors(width, n=500, seed=0):
+    # 大量零元素，覆盖 NZ = 0 .. width 的所有分组 (包括没有模型的分组)
+    rng = np.random.default_rng(seed)
+    vals = rng.integers(-8, 9, size=(n, width))
+    vals[rng.random((n, width)) < 0.4] = 0
+    return vals
+
+
+@pytest.mark.parametrize("module, csv_name, width", [
+    (predict_5, os.path.join('five', 'result_logic_[abcde].csv'), 5),
+    (predict_4, os.path.join('four', 'result_logic_[abcd].csv'), 4),
+])
+def test_predict_batch_matches_predict(module, csv_name, width):
+    predictor = module.HighPrecisionQuantumPredictor(csv_path=os.path.join(HERE, csv_name))
+    assert predictor.is_trained
+
+    vectors = _random_vectors(width)
+    batch = predictor.predict_batch(vectors)
+
+    expected = [predictor.predict(*map(int, v)) for v in vectors]
+    for metric in predictor.metrics:
+        assert batch[metric] == [r[metric] for r in expected], metric